@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.page_parser import available_backends, get_page_parser, has_no_class
+
+fixtures_path = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def parse_page_legacy(html):
+    # The original parsing path, which looks up the fields of each row separately.
+    soup = BeautifulSoup(html, "html.parser")
+    if soup.find("div", {"class": "pagination pagination--no-results"}) is not None:
+        return []
+
+    giveaway_list = soup.find("div", "widget-container").findChild(has_no_class, recursive=False).findChild(
+        has_no_class, recursive=False)
+    rows = []
+    for giveaway_entry in giveaway_list.findAll("div", "giveaway__row-inner-wrap"):
+        rows.append((
+            giveaway_entry.find("a", {"class": "giveaway__heading__name"}).text,
+            int(giveaway_entry.find_all("span", {"class": "giveaway__heading__thin"})[-1].text[1:-2]),
+            giveaway_entry.find("a", {"class": "giveaway__heading__name"})['href'],
+            giveaway_entry.find("a", {"class": "giveaway__heading__name"})['href'].split("/")[2],
+            giveaway_entry.find("a", {"class": "giveaway__icon"})['href'],
+            'is-faded' in giveaway_entry['class']
+        ))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the search page parsers on the saved html fixtures.")
+    parser.add_argument("--repeat", type=int, default=20, help="amount of times each fixture is parsed")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    args = parser.parse_args()
+
+    # Load the saved search pages.
+    fixtures = {}
+    for fixture_name in sorted(os.listdir(fixtures_path)):
+        if fixture_name.startswith("search_") and fixture_name.endswith(".html"):
+            with open(os.path.join(fixtures_path, fixture_name), encoding="utf-8") as f:
+                fixtures[fixture_name] = f.read()
+
+    # Time each parser on each fixture.
+    parsers = dict(legacy=parse_page_legacy)
+    for backend in available_backends():
+        parsers[backend] = get_page_parser(backend)
+    results = []
+    for fixture_name, html in fixtures.items():
+        for parser_name, parse_page in parsers.items():
+            seconds = min(timeit.repeat(lambda: parse_page(html), number=args.repeat, repeat=3)) / args.repeat
+            results.append(dict(fixture=fixture_name, parser=parser_name, ms_per_page=seconds * 1000))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        legacy = next(row for row in results if row["fixture"] == result["fixture"] and row["parser"] == "legacy")
+        print("%-24s %-12s %8.2f ms/page %6.1fx" % (result["fixture"], result["parser"], result["ms_per_page"],
+                                                     legacy["ms_per_page"] / result["ms_per_page"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench.stand_in_server import StandInServer, read_fixture
+from src.console_display import ConsoleDisplay
+from src.session_store import SessionStore
+from src.steamGifts import SteamGifts
+
+
+def create_config(args, url, work_path):
+    # Point all sites to the stand-in and do not limit the requests to it.
+    return {
+        "chrome-profile-path": work_path,
+        "search": dict(entry_min=None, entry_max=None, point_min=None, point_max=None, rating_min=None,
+                       rating_max=None),
+        "settings": dict(auto_quit=0),
+        "urls": dict(steamgifts=url, store=url, steamspy=url + "api.php"),
+        "cache": dict(path=os.path.join(work_path, "cache.db")),
+        "session": dict(path=os.path.join(work_path, "session.json")),
+        "scraper": dict(mode=args.scraper, parser=args.parser),
+        "rate_limit": dict(requests_per_second=1000, max_requests_per_second=1000, jitter=0),
+        "entry": dict(workers=args.entry_workers),
+        "streaming": dict(enabled=args.streaming)
+    }
+
+
+def timed(stages, name, function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    stages[name] = time.perf_counter() - started
+    return result
+
+
+def run_benchmark(args):
+    stand_in = StandInServer(latency=args.latency / 1000, pages=args.pages, points=args.points).start()
+    try:
+        with tempfile.TemporaryDirectory() as work_path:
+            config = create_config(args, stand_in.url, work_path)
+            SessionStore(config["session"]["path"]).save("stand-in", "abcdef0123456789")
+            bot = SteamGifts(config, ConsoleDisplay())
+            bot.session_store = SessionStore(config["session"]["path"])
+
+            # Time each stage of a run, against cold caches.
+            stages = {}
+            started = time.perf_counter()
+            timed(stages, "profile", bot.get_session_profile_info)
+            bot.generate_search_url()
+            if args.streaming:
+                timed(stages, "stream_giveaways", bot.enter_streamed_giveaways)
+            else:
+                giveaways = timed(stages, "retrieve_giveaways", bot.retrieve_giveaways)
+                selected = timed(stages, "select_giveaways", bot.select_giveaways, giveaways)
+                timed(stages, "enter_giveaways", bot.enter_giveaways, selected)
+            stages["end_to_end"] = time.perf_counter() - started
+
+            # Rate bundles that are not cached yet, the apps inside are shared by all bundles.
+            timed(stages, "get_bundle_score", lambda: [bot.get_bundle_score(str(sub_id))
+                                                       for sub_id in range(1, args.bundles + 1)])
+
+            # Parse the recorded search page without the network.
+            html = read_fixture("search_page.html")
+            stages["parse_page"] = min(timeit.repeat(lambda: bot.parse_page(html), number=20, repeat=3)) / 20
+
+            summary = bot.summary(time.time() - stages["end_to_end"], "done")
+            bot.close()
+    finally:
+        stand_in.stop()
+
+    return dict(settings=vars(args), stages=stages, summary=summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time a complete run against a local stand-in of the sites.")
+    parser.add_argument("--latency", type=float, default=50, help="latency of each response in milliseconds")
+    parser.add_argument("--pages", type=int, default=5, help="amount of search pages of each level")
+    parser.add_argument("--points", type=int, default=300, help="points of the profile")
+    parser.add_argument("--bundles", type=int, default=10, help="amount of bundles to rate")
+    parser.add_argument("--scraper", default="sync", choices=("sync", "async", "planned"), help="scraper mode")
+    parser.add_argument("--parser", default="auto", help="search page parser")
+    parser.add_argument("--entry-workers", type=int, default=4, help="amount of entries sent at once")
+    parser.add_argument("--streaming", action="store_true", help="enter the giveaways while they are found")
+    args = parser.parse_args()
+
+    # Only the results are printed.
+    logging.getLogger("steamgifts").setLevel(logging.CRITICAL)
+    print(json.dumps(run_benchmark(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
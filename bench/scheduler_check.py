@@ -0,0 +1,61 @@
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.entry_scheduler import EntryScheduler
+from src.entry_selector import EntrySelector
+
+
+def create_scheduler(points, points_per_hour=0):
+    # The plan only needs the profile and the config of the bot.
+    sg_bot = SimpleNamespace(profile=dict(name="check", points=points), caches=SimpleNamespace(candidates=None),
+                             config=dict(selection={}))
+    return EntryScheduler(sg_bot, dict(points_per_hour=points_per_hour))
+
+
+def create_giveaway(giveaway_id, points, rating, end_time):
+    return dict(giveaway_id=giveaway_id, name=giveaway_id, points=points, rating=rating, end_time=end_time,
+                copies=1, entries=100)
+
+
+def check_cheap_giveaways():
+    # Five cheap giveaways are worth more than a single expensive one that is rated slightly better.
+    end_time = time.time() + 3600
+    candidates = [create_giveaway("big", 50, 91, end_time)] + [
+        create_giveaway("small%i" % index, 10, 90, end_time) for index in range(5)]
+    planned = sorted(giveaway["giveaway_id"] for giveaway in create_scheduler(50).plan(candidates, time.time()))
+    return planned == ["small%i" % index for index in range(5)], planned
+
+
+def check_random_plans(runs=200):
+    # Without earning points the plan is worth at least as much as the selection of a normal run.
+    now = time.time()
+    selector = EntrySelector({})
+    for run in range(runs):
+        points = random.randint(0, 300)
+        candidates = [create_giveaway(str(index), random.choice((1, 5, 10, 15, 20, 25, 50, 80)),
+                                      random.uniform(0, 100), now + random.uniform(3600, 7200))
+                      for index in range(random.randint(0, 40))]
+        planned = create_scheduler(points).plan(candidates, now)
+        _, selected_value = selector.select(candidates, points)
+        planned_value = sum(selector.value(giveaway, now) for giveaway in planned)
+        if sum(giveaway["points"] for giveaway in planned) > points or planned_value < selected_value - 1e-9:
+            return False, (points, planned_value, selected_value)
+    return True, runs
+
+
+def main():
+    # Compare the plans of the scheduler with the selection of a normal run.
+    failed = False
+    for check in (check_cheap_giveaways, check_random_plans):
+        passed, details = check()
+        print("%s %s: %s" % ("ok" if passed else "FAILED", check.__name__, details))
+        failed = failed or not passed
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from src.page_parser import parse_page_soup
+
+fixtures_path = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(fixtures_path, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class StandInServer:
+    # Replays the recorded pages of SteamGifts, the Steam store and SteamSpy on a single local port.
+    def __init__(self, latency=0.05, pages=5, points=300):
+        self.latency = latency
+        self.pages = pages
+        self.points = points
+        self.lock = threading.Lock()
+
+        # Load the recorded responses.
+        self.home_page = read_fixture("home_page.html")
+        self.search_page = read_fixture("search_page.html")
+        self.no_results_page = read_fixture("search_no_results.html")
+        self.bundle_page = read_fixture("bundle_page.html")
+        self.app_details = json.loads(read_fixture("steamspy_appdetails.json"))
+        self.entry_response = json.loads(read_fixture("ajax_entry_insert.json"))
+
+        # The price of each giveaway on the search page, to charge the entries.
+        self.costs = {row.giveaway_id: row.points for row in parse_page_soup(self.search_page).rows}
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.create_handler())
+        self.server.daemon_threads = True
+        self.url = "http://127.0.0.1:%i/" % self.server.server_port
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def create_handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(stand_in.latency)
+                url = urlsplit(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path == "/":
+                    self.respond(stand_in.render_home_page())
+                elif url.path == "/giveaways/search":
+                    self.respond(stand_in.render_search_page(query.get("level_min", "0"), int(query.get("page", 1))))
+                elif url.path.startswith("/sub/"):
+                    self.respond(stand_in.bundle_page)
+                elif url.path == "/api.php":
+                    self.respond(json.dumps(dict(stand_in.app_details, appid=int(query.get("appid", 0)))),
+                                 "application/json")
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                time.sleep(stand_in.latency)
+                if urlsplit(self.path).path != "/ajax.php":
+                    self.send_error(404)
+                    return
+                form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+                self.respond(json.dumps(stand_in.enter(form.get("code", [""])[0])), "application/json")
+
+            def respond(self, body, content_type="text/html"):
+                body = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def render_home_page(self):
+        with self.lock:
+            return self.home_page.replace('<span class="nav__points">300</span>',
+                                          '<span class="nav__points">%i</span>' % self.points)
+
+    def render_search_page(self, level, page):
+        if page > self.pages:
+            return self.no_results_page
+
+        # Give the giveaways of each page their own code, ending an hour from now.
+        now = int(time.time())
+        html = self.search_page.replace("/giveaway/", "/giveaway/L%sP%i" % (level, page))
+
+        # Show the amount of pages that are served in the pagination.
+        html = html.replace("<strong>1,234</strong>", "<strong>{:,}</strong>".format(len(self.costs) * self.pages))
+        html = html.replace('page=25" data-page-number="25"', 'page={0}" data-page-number="{0}"'.format(self.pages))
+        return re.sub(r'data-timestamp="(\d+)"',
+                      lambda match: 'data-timestamp="%i"' % (now + 3600 + int(match.group(1)) % 100000), html)
+
+    def enter(self, code):
+        # Charge the giveaway, the response holds the points that are left.
+        cost = self.costs.get(re.sub(r"^L\d+P\d+", "", code))
+        with self.lock:
+            if cost is None:
+                return dict(type="error", msg="Giveaway not found")
+            if cost > self.points:
+                return dict(type="error", msg="Not Enough Points")
+            self.points -= cost
+            return dict(self.entry_response, points=str(self.points))
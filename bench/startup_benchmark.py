@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+root_path = os.path.join(os.path.dirname(__file__), "..")
+
+# The dependencies that are slow to import and only needed on some code paths.
+heavy_modules = ("selenium", "webdriver_manager", "bs4", "numpy", "lxml", "selectolax", "tkinter", "requests")
+
+
+def time_command(command, repeat):
+    # Time each start of the command until it exits, e.g. after printing the help.
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=root_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        seconds.append(time.perf_counter() - started)
+    return dict(min=min(seconds), median=statistics.median(seconds), max=max(seconds))
+
+
+def loaded_modules(module):
+    # Return the heavy dependencies that are imported when the module is loaded.
+    code = "import importlib, json, sys; importlib.import_module(%r); print(json.dumps(sorted(sys.modules)))" % module
+    modules = json.loads(subprocess.run([sys.executable, "-c", code], cwd=root_path, capture_output=True,
+                                        text=True, check=True).stdout)
+    return [name for name in heavy_modules if name in modules]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold-start time of the bot.")
+    parser.add_argument("--repeat", type=int, default=10, help="amount of starts to time")
+    parser.add_argument("--command", nargs=argparse.REMAINDER,
+                        help="the command to time instead of the python module, e.g. dist/steamgifts-cli/steamgifts-cli")
+    args = parser.parse_args()
+
+    # Time the headless bot up to parsing its arguments, which is after all the imports.
+    command = (args.command or [sys.executable, "-m", "src.cli"]) + ["--help"]
+    results = dict(command=" ".join(command), seconds=time_command(command, args.repeat))
+    if not args.command:
+        results["imported"] = loaded_modules("src.cli")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# -*- mode: python ; coding: utf-8 -*-
+# A slim build of the headless bot for scheduled runs: pyinstaller slim.spec
+# Selenium and the GUI are left out, thus the session has to be stored by a browser login of the full version first.
+# The build is a folder instead of a single file, so it is not unpacked again on each start.
+
+block_cipher = None
+
+
+a = Analysis(['src/cli.py'],
+             pathex=['.'],
+             binaries=[],
+             datas=[],
+             hiddenimports=[],
+             hookspath=[],
+             runtime_hooks=[],
+             excludes=['selenium', 'webdriver_manager', 'numpy', 'tkinter', 'src.display'],
+             win_no_prefer_redirects=False,
+             win_private_assemblies=False,
+             cipher=block_cipher,
+             noarchive=False)
+pyz = PYZ(a.pure, a.zipped_data,
+             cipher=block_cipher)
+exe = EXE(pyz,
+          a.scripts,
+          [],
+          exclude_binaries=True,
+          name='steamgifts-cli',
+          debug=False,
+          bootloader_ignore_signals=False,
+          strip=False,
+          upx=False,
+          console=True )
+coll = COLLECT(exe,
+               a.binaries,
+               a.zipfiles,
+               a.datas,
+               strip=False,
+               upx=False,
+               upx_exclude=[],
+               name='steamgifts-cli')
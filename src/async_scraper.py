@@ -0,0 +1,99 @@
+import asyncio
+
+from src.log_colors import *
+from src.page_scraper import PageScraper
+
+
+class AsyncPageScraper(PageScraper):
+    def __init__(self, sg_bot, parsed_entries, use_query, min_total_points):
+        # Load the scraper settings.
+        scraper_config = sg_bot.config.get("scraper", {})
+        self.prefetch_pages = scraper_config.get("prefetch_pages", 3)
+        self.prefetch_levels = scraper_config.get("prefetch_levels", 2)
+        super().__init__(sg_bot, parsed_entries, use_query, min_total_points,
+                         self.prefetch_pages * self.prefetch_levels)
+
+        # Keep track of the levels that are being mined and the next page of each level.
+        self.next_level = sg_bot.profile["level"]
+        self.active_levels = []
+        self.next_page = {}
+        self.in_flight = {}
+        self.empty_page = {}
+        self.loop = None
+
+    def submit(self, key):
+        # The pages are fetched by the threads of the executor, awaited on the event loop.
+        self.fetches[key] = self.loop.run_in_executor(self.executor, self.fetch_page, *key)
+
+    def activate_levels(self):
+        # Start mining lower levels while there are free level slots.
+        while len(self.active_levels) < self.prefetch_levels and self.next_level >= 0:
+            self.active_levels.append(self.next_level)
+            self.next_page[self.next_level] = 1
+            self.in_flight[self.next_level] = 0
+            self.next_level -= 1
+
+    def schedule_pages(self):
+        if self.wait_for_target():
+            return
+        self.activate_levels()
+
+        # Keep a couple of pages in flight for each active level.
+        for level in self.active_levels:
+            while self.in_flight[level] < self.prefetch_pages:
+                self.submit((level, self.next_page[level]))
+                self.next_page[level] += 1
+                self.in_flight[level] += 1
+
+    def is_exhausted(self, level, page):
+        return level in self.empty_page and page >= self.empty_page[level]
+
+    def finish_level(self, level, page):
+        # Remember the first empty page of the level, earlier pages may still be in flight.
+        self.empty_page[level] = min(page, self.empty_page.get(level, page))
+        if level not in self.active_levels:
+            return
+        self.sg_bot.display.log_console_text(
+            "There were no more entries matching your search criteria for level %d, lower level for more results." %
+            level, log_warning)
+        self.active_levels.remove(level)
+
+        # The pages after the empty one will not have results either.
+        self.cancel_fetches(level, page)
+
+    async def iterate(self):
+        # Yield after each parsed page.
+        self.loop = asyncio.get_running_loop()
+        try:
+            self.schedule_pages()
+            while self.fetches and not self.target_reached():
+                keys = {future: key for key, future in self.fetches.items()}
+                done, _ = await asyncio.wait(list(keys), return_when=asyncio.FIRST_COMPLETED)
+
+                # Parse the fetched pages in (level, page) order, the fetching continues in the background.
+                for level, page in sorted((keys[future] for future in done), key=lambda key: (-key[0], key[1])):
+                    # Skip the pages that were cancelled when an earlier page of the level was empty.
+                    if (level, page) not in self.fetches:
+                        continue
+                    self.in_flight[level] -= 1
+
+                    # Stop parsing once the pending ratings reached the target.
+                    if self.wait_for_target():
+                        break
+
+                    # Skip the pages that could not be fetched, too many failures in a row raise.
+                    giveaway_page = self.fetched_page((level, page))
+                    if giveaway_page is None:
+                        continue
+
+                    # Parse the page, an empty page means the level is exhausted.
+                    if not self.is_exhausted(level, page) and \
+                            not self.sg_bot.parse_giveaways_page(giveaway_page, self.parsed_entries, level, page):
+                        self.finish_level(level, page)
+                    yield
+
+                # Keep the prefetch window filled.
+                if not self.target_reached():
+                    self.schedule_pages()
+        finally:
+            self.close()
@@ -0,0 +1,501 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.http_session import HttpSession
+from src.rating_catalog import download_catalog, read_catalog_file, refresh_catalog
+from src.scoring import Scorer
+
+
+class SqliteCache:
+    # The table holding the cached rows, overridden by each cache.
+    table = None
+    schema = None
+
+    # The columns that were added to the table later, as (name, type).
+    added_columns = ()
+
+    def __init__(self, path="cache.db", ttl=7 * 24 * 60 * 60, max_entries=20000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # Keep track of the cache statistics.
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # A single connection is shared, thus guard it with a lock.
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(self.schema)
+
+            # The caches of older versions do not have the added columns yet.
+            columns = [column[1] for column in self.connection.execute("PRAGMA table_info(%s)" % self.table)]
+            for name, column_type in self.added_columns:
+                if name not in columns:
+                    self.connection.execute("ALTER TABLE %s ADD COLUMN %s %s" % (self.table, name, column_type))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def is_expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def evict(self):
+        # Only evict when the cache is bounded.
+        if not self.max_entries:
+            return
+
+        # Remove the least recently used rows that exceed the bound.
+        count = self.connection.execute("SELECT COUNT(*) FROM %s" % self.table).fetchone()[0]
+        if count <= self.max_entries:
+            return
+        overflow = count - self.max_entries
+        self.connection.execute(
+            "DELETE FROM %s WHERE rowid IN (SELECT rowid FROM %s ORDER BY accessed_at ASC LIMIT ?)"
+            % (self.table, self.table), (overflow,))
+        self.evictions += overflow
+
+    def clear(self):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM %s" % self.table)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0
+        return self.hits / lookups
+
+    def stats_text(self):
+        return "%s: %i hits, %i misses (%0.1f%% hit rate), %i evicted" % (
+            self.table, self.hits, self.misses, self.hit_rate() * 100, self.evictions)
+
+
+class RatingCache(SqliteCache):
+    table = "ratings"
+    schema = """
+        CREATE TABLE IF NOT EXISTS ratings (
+            appid TEXT PRIMARY KEY,
+            score REAL NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            positive INTEGER,
+            negative INTEGER,
+            model TEXT
+        )"""
+    added_columns = (("positive", "INTEGER"), ("negative", "INTEGER"), ("model", "TEXT"))
+
+    def get(self, appid):
+        # Return the ((positive, negative), score, model) of the app, the score is only used by the same model.
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT positive, negative, stored_at, score, model FROM ratings WHERE appid = ?",
+                (str(appid),)).fetchone()
+
+            # Count a missing or expired rating as a miss, as well as a score of an older version without reviews.
+            if row is None or row[0] is None or self.is_expired(row[2]):
+                self.misses += 1
+                return None
+
+            # Touch the row so it is kept by the LRU eviction.
+            self.connection.execute(
+                "UPDATE ratings SET accessed_at = ? WHERE appid = ?", (time.time(), str(appid)))
+            self.hits += 1
+            return (row[0], row[1]), row[3], row[4]
+
+    def put(self, appid, positive, negative, score, model):
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO ratings (appid, score, stored_at, accessed_at, positive, negative, model) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (str(appid), score, now, now, positive, negative, model))
+            self.evict()
+
+
+class BundleCache(SqliteCache):
+    table = "bundles"
+    schema = """
+        CREATE TABLE IF NOT EXISTS bundles (
+            sub_id TEXT PRIMARY KEY,
+            appids TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )"""
+
+    def get(self, sub_id):
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT appids, stored_at FROM bundles WHERE sub_id = ?", (str(sub_id),)).fetchone()
+
+            # Count a missing or expired bundle as a miss.
+            if row is None or self.is_expired(row[1]):
+                self.misses += 1
+                return None
+
+            # Touch the row so it is kept by the LRU eviction.
+            self.connection.execute(
+                "UPDATE bundles SET accessed_at = ? WHERE sub_id = ?", (time.time(), str(sub_id)))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, sub_id, appids):
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO bundles (sub_id, appids, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (str(sub_id), json.dumps([str(appid) for appid in appids]), now, now))
+            self.evict()
+
+    def invalidate(self, sub_id):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM bundles WHERE sub_id = ?", (str(sub_id),))
+
+
+class PageCache(SqliteCache):
+    table = "pages"
+    schema = """
+        CREATE TABLE IF NOT EXISTS pages (
+            search TEXT PRIMARY KEY,
+            has_results INTEGER NOT NULL,
+            rows TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            total_results INTEGER,
+            last_page INTEGER
+        )"""
+    added_columns = (("total_results", "INTEGER"), ("last_page", "INTEGER"))
+
+    def get(self, search):
+        # Return the cached (has_results, rows, total_results, last_page) of the search.
+        # The rows hold no user specific state.
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT has_results, rows, stored_at, total_results, last_page FROM pages WHERE search = ?",
+                (search,)).fetchone()
+
+            # Count a missing or expired page as a miss.
+            if row is None or self.is_expired(row[2]):
+                self.misses += 1
+                return None
+
+            # Touch the row so it is kept by the LRU eviction.
+            self.connection.execute("UPDATE pages SET accessed_at = ? WHERE search = ?", (time.time(), search))
+            self.hits += 1
+            return bool(row[0]), json.loads(row[1]), row[3], row[4]
+
+    def put(self, search, has_results, rows, total_results=None, last_page=None):
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (search, has_results, rows, stored_at, accessed_at, total_results, "
+                "last_page) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (search, int(has_results), json.dumps(rows), now, now, total_results, last_page))
+            self.evict()
+
+
+class LevelStatsCache(SqliteCache):
+    table = "level_stats"
+    schema = """
+        CREATE TABLE IF NOT EXISTS level_stats (
+            search TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            total_results INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (search, level)
+        )"""
+
+    def get_totals(self, search):
+        # Return the amount of giveaways of each level that was seen recently for the search.
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT level, total_results FROM level_stats WHERE search = ? AND stored_at >= ?",
+                (search, time.time() - self.ttl)).fetchall()
+        self.hits += len(rows)
+        return dict(rows)
+
+    def put(self, search, levels, total_results):
+        # The total of a range of levels is spread evenly over its levels.
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO level_stats (search, level, total_results, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(search, level, total_results // len(levels), now, now) for level in levels])
+            self.evict()
+
+
+class EnteredCache(SqliteCache):
+    table = "entered"
+    schema = """
+        CREATE TABLE IF NOT EXISTS entered (
+            account TEXT NOT NULL,
+            giveaway_id TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (account, giveaway_id)
+        )"""
+
+    def filter_entered(self, account, giveaway_ids):
+        # Return the giveaways the account has entered.
+        giveaway_ids = list(giveaway_ids)
+        if not giveaway_ids:
+            return set()
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT giveaway_id, stored_at FROM entered WHERE account = ? AND giveaway_id IN (%s)" %
+                ", ".join("?" * len(giveaway_ids)), [account] + giveaway_ids).fetchall()
+        return set(giveaway_id for giveaway_id, stored_at in rows if not self.is_expired(stored_at))
+
+    def add(self, account, giveaway_ids):
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO entered (account, giveaway_id, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(account, giveaway_id, now, now) for giveaway_id in giveaway_ids])
+            self.evict()
+
+
+class CandidateIndex(SqliteCache):
+    table = "candidates"
+    schema = """
+        CREATE TABLE IF NOT EXISTS candidates (
+            account TEXT NOT NULL,
+            giveaway_id TEXT NOT NULL,
+            giveaway TEXT NOT NULL,
+            end_time REAL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (account, giveaway_id)
+        )"""
+
+    def get_open(self, account):
+        # Return the rated giveaways of the account that did not end yet, the ended ones are removed.
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM candidates WHERE account = ? AND end_time IS NOT NULL AND end_time <= ?", (account, now))
+            rows = self.connection.execute(
+                "SELECT giveaway FROM candidates WHERE account = ? AND stored_at >= ?",
+                (account, now - self.ttl)).fetchall()
+        self.hits += len(rows)
+        return [json.loads(row[0]) for row in rows]
+
+    def last_scan(self, account):
+        # Return when the search pages were scanned for the account, None if there are no candidates.
+        with self.lock:
+            return self.connection.execute(
+                "SELECT MAX(stored_at) FROM candidates WHERE account = ?", (account,)).fetchone()[0]
+
+    def put_many(self, account, giveaways):
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO candidates (account, giveaway_id, giveaway, end_time, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(account, giveaway["giveaway_id"], json.dumps(giveaway), giveaway.get("end_time"), now, now)
+                 for giveaway in giveaways])
+            self.evict()
+
+    def remove(self, account, giveaway_ids):
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM candidates WHERE account = ? AND giveaway_id = ?",
+                                        [(account, giveaway_id) for giveaway_id in giveaway_ids])
+
+
+class SeenIndex(SqliteCache):
+    table = "seen"
+    schema = """
+        CREATE TABLE IF NOT EXISTS seen (
+            account TEXT NOT NULL,
+            giveaway_id TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            value REAL,
+            PRIMARY KEY (account, giveaway_id)
+        )"""
+    added_columns = (("value", "REAL"),)
+
+    def filter_seen(self, account, giveaway_ids, still_rejected=None):
+        # Return the rejection reason of the giveaways the account processed before.
+        # The giveaways whose rejected value passes the current filters, according to still_rejected, are left out.
+        giveaway_ids = list(giveaway_ids)
+        if not giveaway_ids:
+            return {}
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT giveaway_id, reason, value FROM seen WHERE account = ? AND expires_at > ? AND giveaway_id IN "
+                "(%s)" % ", ".join("?" * len(giveaway_ids)), [account, time.time()] + giveaway_ids).fetchall()
+        seen = {giveaway_id: reason for giveaway_id, reason, value in rows
+                if still_rejected is None or still_rejected(reason, value)}
+        self.hits += len(seen)
+        self.misses += len(giveaway_ids) - len(seen)
+        return seen
+
+    def add(self, account, giveaway_id, reason, expires_at=None, value=None):
+        # Remember the giveaway until it ends, or until the ttl passed when the end is unknown.
+        # The value it was rejected for is kept, so it is checked again when the filters change.
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO seen (account, giveaway_id, reason, expires_at, accessed_at, value) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (account, giveaway_id, reason, expires_at or now + self.ttl, now, value))
+
+            # Drop the giveaways that ended.
+            self.connection.execute("DELETE FROM seen WHERE expires_at <= ?", (now,))
+            self.evict()
+
+
+class RatingCatalog(SqliteCache):
+    table = "catalog"
+    schema = """
+        CREATE TABLE IF NOT EXISTS catalog (
+            appid TEXT PRIMARY KEY,
+            positive INTEGER NOT NULL,
+            negative INTEGER NOT NULL,
+            score REAL NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            model TEXT
+        )"""
+    added_columns = (("model", "TEXT"),)
+
+    def __init__(self, path="cache.db", ttl=30 * 24 * 60 * 60):
+        # The catalog is never evicted, stale rows are refreshed instead.
+        super().__init__(path=path, ttl=ttl, max_entries=None)
+        with self.lock, self.connection:
+            self.connection.execute("CREATE INDEX IF NOT EXISTS catalog_stored_at ON catalog (stored_at)")
+
+        # The reviews are answered from memory, loaded on the first lookup.
+        self.reviews = None
+
+    def load(self):
+        # Load the reviews, age and score of all apps at once, as ((positive, negative), stored_at, score, model).
+        with self.lock:
+            if self.reviews is None:
+                self.reviews = {appid: ((positive, negative), stored_at, score, model)
+                                for appid, positive, negative, stored_at, score, model in self.connection.execute(
+                                    "SELECT appid, positive, negative, stored_at, score, model FROM catalog")}
+        return self.reviews
+
+    def get(self, appid):
+        # Return the ((positive, negative), is fresh) of the app, None if the app is not in the catalog.
+        row = (self.reviews if self.reviews is not None else self.load()).get(str(appid))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], not self.is_expired(row[1])
+
+    def put_many(self, reviews, scorer):
+        # Store the (appid, positive, negative) reviews, with the scores of the model computed in one pass.
+        reviews = list(reviews)
+        scores = scorer.score_many((positive, negative) for _, positive, negative in reviews)
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO catalog (appid, positive, negative, score, stored_at, accessed_at, model) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(str(appid), positive, negative, score, now, now, scorer.model)
+                 for (appid, positive, negative), score in zip(reviews, scores)])
+
+            # Keep the loaded reviews up to date.
+            if self.reviews is not None:
+                for (appid, positive, negative), score in zip(reviews, scores):
+                    self.reviews[str(appid)] = ((positive, negative), now, score, scorer.model)
+        return len(reviews)
+
+    def put(self, appid, positive, negative, scorer):
+        self.put_many([(appid, positive, negative)], scorer)
+
+    def clear(self):
+        super().clear()
+        self.reviews = None
+
+    def stale_appids(self, limit=None):
+        # Return the apps that were not refreshed within the ttl, the oldest first.
+        with self.lock:
+            return [appid for appid, in self.connection.execute(
+                "SELECT appid FROM catalog WHERE stored_at < ? ORDER BY stored_at ASC LIMIT ?",
+                (time.time() - self.ttl, -1 if limit is None else limit))]
+
+
+class Caches:
+    def __init__(self, cache_config):
+        # All the caches are stored in the same database file.
+        path = cache_config.get("path", "cache.db")
+        self.ratings = RatingCache(path=path, ttl=cache_config.get("rating_ttl", 7 * 24 * 60 * 60),
+                                   max_entries=cache_config.get("rating_max_entries", 20000))
+        self.bundles = BundleCache(path=path, ttl=cache_config.get("bundle_ttl", 30 * 24 * 60 * 60),
+                                   max_entries=cache_config.get("bundle_max_entries", 5000))
+        self.pages = PageCache(path=path, ttl=cache_config.get("page_ttl", 5 * 60),
+                               max_entries=cache_config.get("page_max_entries", 1000))
+        self.entered = EnteredCache(path=path, ttl=cache_config.get("entered_ttl", 60 * 24 * 60 * 60),
+                                    max_entries=cache_config.get("entered_max_entries", 100000))
+        self.seen = SeenIndex(path=path, ttl=cache_config.get("seen_ttl", 7 * 24 * 60 * 60),
+                              max_entries=cache_config.get("seen_max_entries", 100000))
+        self.candidates = CandidateIndex(path=path, ttl=cache_config.get("candidate_ttl", 24 * 60 * 60),
+                                         max_entries=cache_config.get("candidate_max_entries", 20000))
+        self.levels = LevelStatsCache(path=path, ttl=cache_config.get("level_stats_ttl", 6 * 60 * 60),
+                                      max_entries=cache_config.get("level_stats_max_entries", 1000))
+        self.catalog = RatingCatalog(path=path, ttl=cache_config.get("catalog_ttl", 30 * 24 * 60 * 60))
+
+    def close(self):
+        for cache in (self.ratings, self.bundles, self.pages, self.levels, self.entered, self.seen,
+                      self.candidates, self.catalog):
+            cache.close()
+
+    def stats_text(self):
+        return "\n".join(" - " + cache.stats_text() for cache in (self.catalog, self.ratings, self.bundles, self.pages,
+                                                                 self.seen))
+
+
+# Allow clearing the caches from the command line, e.g. `python -m src.cache invalidate-bundle 12345`.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the caches of the bot.")
+    parser.add_argument("--config", default="config.json", help="the config file holding the cache settings")
+    parser.add_argument("--path", help="the cache database, instead of the path of the config file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("invalidate-bundle", help="forget a bundle that changed").add_argument("sub_id")
+    commands.add_parser("clear", help="empty a cache").add_argument(
+        "cache", choices=("ratings", "bundles", "pages", "levels", "seen", "candidates", "entered", "catalog"))
+    commands.add_parser("import-catalog", help="import a SteamSpy dump or a csv file").add_argument(
+        "file", help="a .json or .csv file")
+    commands.add_parser("download-catalog", help="download the SteamSpy dump").add_argument(
+        "pages", type=int, nargs="?")
+    commands.add_parser("refresh-catalog", help="look up the outdated apps of the catalog again").add_argument(
+        "limit", type=int, nargs="?")
+    args = parser.parse_args()
+
+    # Use the cache and rating settings of the config file when there is one, the path argument goes first.
+    config = {}
+    if os.path.exists(args.config):
+        with open(args.config) as config_file:
+            config = json.load(config_file)
+    cache_config = config.get("cache", {})
+    if args.path:
+        cache_config = dict(cache_config, path=args.path)
+
+    # The catalog is stored with the scores of the configured model, so the runs do not score it again.
+    scorer = Scorer(config.get("ratings", {}))
+    caches = Caches(cache_config)
+    try:
+        if args.command == "invalidate-bundle":
+            caches.bundles.invalidate(args.sub_id)
+        elif args.command == "clear":
+            getattr(caches, args.cache).clear()
+        elif args.command == "import-catalog":
+            print("Imported %i apps." % caches.catalog.put_many(read_catalog_file(args.file), scorer))
+        elif args.command == "download-catalog":
+            print("Downloaded %i apps." % download_catalog(caches.catalog, HttpSession(), scorer, args.pages))
+        elif args.command == "refresh-catalog":
+            print("Refreshed %i apps." % refresh_catalog(caches.catalog, HttpSession(), scorer, args.limit))
+    finally:
+        caches.close()
@@ -0,0 +1,78 @@
+import argparse
+import json
+import logging
+import sys
+import time
+
+from src.console_display import ConsoleDisplay
+from src.log_colors import *
+from src.multi_account import MultiAccountRunner
+from src.steamGifts import SteamGifts
+
+
+def run_once(args):
+    # Run all accounts of the accounts file, or the single account of the config file.
+    if args.accounts:
+        with open(args.accounts) as f:
+            return MultiAccountRunner(json.load(f)).run()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    display = ConsoleDisplay()
+    try:
+        return [SteamGifts(config, display).run()]
+    except Exception as exception:
+        # Keep the daemon running, the next run may succeed.
+        display.log_console_text("Run failed: %s" % exception, log_error)
+        return [dict(status="failed", error=str(exception))]
+
+
+def write_summaries(args, summaries):
+    # Write one json line per account run, on stdout and optionally appended to the summary file.
+    for summary in summaries:
+        summary["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        line = json.dumps(summary)
+        print(line, flush=True)
+        if args.summary_file:
+            with open(args.summary_file, "a") as f:
+                f.write(line + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enter SteamGifts giveaways without the GUI.")
+    parser.add_argument("--config", default="config.json", help="the config file of the account")
+    parser.add_argument("--accounts", help="an accounts file, to run multiple accounts instead of the config file")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="keep running and start a new run every given minutes, e.g. the point regeneration time")
+    parser.add_argument("--scheduled", action="store_true",
+                        help="keep running and start each run at the time planned by the scheduler of the config")
+    parser.add_argument("--summary-file", help="append the json summary of each run to this file")
+    parser.add_argument("--quiet", action="store_true", help="only log warnings and errors")
+    args = parser.parse_args()
+
+    # The log goes to stderr, stdout only holds the run summaries.
+    logging.basicConfig(stream=sys.stderr, level=logging.WARNING if args.quiet else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    while True:
+        started = time.time()
+        summaries = run_once(args)
+        write_summaries(args, summaries)
+
+        # A single run exits with an error code when an account failed.
+        if not args.interval and not args.scheduled:
+            return 0 if all(summary["status"] == "done" for summary in summaries) else 1
+
+        # Wait for the next run, the scheduler plans it for the account that needs it first.
+        next_run_at = started + (args.interval or 60) * 60
+        planned_runs = [summary["next_run_at"] for summary in summaries if summary.get("next_run_at")]
+        if args.scheduled and planned_runs:
+            next_run_at = min(planned_runs)
+        time.sleep(max(0, next_run_at - time.time()))
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,29 @@
+import logging
+
+from src.log_colors import *
+
+logger = logging.getLogger("steamgifts")
+
+
+class ConsoleDisplay:
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+
+    def log_console_text(self, text, config=None):
+        # Log each line separately, marked with the prefix.
+        level = logging.ERROR if config is log_error else logging.WARNING if config is log_warning else logging.INFO
+        for split_line in str(text).split("\n"):
+            if split_line:
+                logger.log(level, self.prefix + split_line)
+
+    def update_profile_display(self, profile):
+        pass
+
+    def update_current_mining_display(self, entries, points):
+        pass
+
+    def update_entered_display(self, entered):
+        pass
+
+    def quit_application(self):
+        pass
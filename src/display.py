@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import filedialog
 import json
+import queue
+import threading
 
 from src.steamGifts import SteamGifts
 from src.log_colors import *
@@ -9,8 +11,12 @@ import sys
 
 class Display(tk.Tk):
     config = dict()
-    log_counter = 0
     sg_bot = None
+    sg_bot_thread = None
+
+    # The bot posts its display updates to queues, the GUI thread applies them in batches.
+    poll_interval = 50
+    log_batch_size = 500
 
     # The profile session side-panel.
     current_session_username = None
@@ -35,6 +41,9 @@ class Display(tk.Tk):
         self.geometry("640x480")
         # First load the config files.
         self.load_config()
+        self.log_max_lines = self.config["settings"].get("log_max_lines", 1000)
+        self.events = queue.Queue()
+        self.log_lines = queue.Queue()
 
         self.main = tk.Frame(self)
         self.main.pack(fill=tk.BOTH, expand=1, padx=5, pady=5)
@@ -97,6 +106,9 @@ class Display(tk.Tk):
         self.log_console_text("Simply press \"Enter Giveaways\" to enter giveaways automatically.")
         self.log_console_text("Good luck!")
 
+        # Start applying the updates of the bot.
+        self.after(self.poll_interval, self.process_events)
+
         # Auto start giveaways if option is enabled
         if self.config["settings"]["auto_start"] == 1:
             self.enter()
@@ -105,9 +117,50 @@ class Display(tk.Tk):
         tk.mainloop()
 
     def quit_application(self):
+        # The bot can quit the application as well, thus close it from the GUI thread.
+        self.events.put((self.close_application, ()))
+
+    def close_application(self):
         self.quit()
         sys.exit()
 
+    def post(self, function, *args):
+        self.events.put((function, args))
+
+    def process_events(self):
+        # Apply all the display updates.
+        while True:
+            try:
+                function, args = self.events.get_nowait()
+            except queue.Empty:
+                break
+            function(*args)
+
+        # Add a batch of lines to the log.
+        added_lines = 0
+        while added_lines < self.log_batch_size:
+            try:
+                line, config = self.log_lines.get_nowait()
+            except queue.Empty:
+                break
+            self.log.insert(tk.END, line)
+
+            # Set the coloring.
+            if config is not None:
+                self.log.itemconfig(tk.END, config)
+            added_lines += 1
+
+        if added_lines:
+            # Only keep the latest lines in the log.
+            overflow = self.log.size() - self.log_max_lines
+            if overflow > 0:
+                self.log.delete(0, overflow - 1)
+
+            # Auto move the yview
+            self.log.yview_moveto(1)
+
+        self.after(self.poll_interval, self.process_events)
+
     def create_profile_display(self):
         # Create the profile.
         import_group = tk.LabelFrame(self.main, text="Profile", fg="steel blue")
@@ -130,9 +183,9 @@ class Display(tk.Tk):
             .grid(row=2, column=1, sticky=tk.EW)
 
     def update_profile_display(self, profile):
-        self.current_session_username.set(profile["name"])
-        self.current_session_level.set(str(profile["level"]))
-        self.current_session_points.set(str(profile["points"]))
+        self.post(self.current_session_username.set, profile["name"])
+        self.post(self.current_session_level.set, str(profile["level"]))
+        self.post(self.current_session_points.set, str(profile["points"]))
 
     def create_mining_display(self):
         # Create the profile.
@@ -158,8 +211,11 @@ class Display(tk.Tk):
             .grid(row=2, column=1, sticky=tk.EW)
 
     def update_current_mining_display(self, entries, points):
-        self.current_session_entries.set(str(entries))
-        self.current_session_total_points.set(str(points))
+        self.post(self.current_session_entries.set, str(entries))
+        self.post(self.current_session_total_points.set, str(points))
+
+    def update_entered_display(self, entered):
+        self.post(self.current_session_entered.set, str(entered))
 
     def create_settings_display(self):
         import_group = tk.LabelFrame(self.main, text="Settings", fg="steel blue")
@@ -212,30 +268,30 @@ class Display(tk.Tk):
         # Split the lines.
         split_lines = str(text).split("\n")
 
-        # Add each line separately to the log.
+        # Queue each line separately for the log.
         for split_line in split_lines:
             # Normal console log.
             print(split_line)
-
-            # Insert the line.
-            self.log.insert(tk.END, split_line)
-
-            # Set the coloring.
-            if config is not None:
-                self.log.itemconfig(self.log_counter, config)
-
-            # Increment the counter.
-            self.log_counter = self.log_counter + 1
-
-            # Auto move the yview
-            self.log.yview_moveto(1)
-            self.update()
+            self.log_lines.put((split_line, config))
 
     def enter(self):
+        # Only run a single bot at a time.
+        if self.sg_bot_thread is not None and self.sg_bot_thread.is_alive():
+            self.log_console_text("The SteamGifts enter bot is already running.", config=log_warning)
+            return
+
         self.log_console_text("\nStarting the SteamGifts enter bot.", config=log_verbose)
 
-        # Start the bot TODO: Add multi-threading to allow functioning GUI.
-        self.sg_bot = SteamGifts(self.config, self)
+        # Start the bot on its own thread, to keep the GUI responsive.
+        self.sg_bot_thread = threading.Thread(target=self.run_bot, daemon=True)
+        self.sg_bot_thread.start()
+
+    def run_bot(self):
+        try:
+            self.sg_bot = SteamGifts(self.config, self)
+            self.sg_bot.run()
+        except Exception as exception:
+            self.log_console_text("The SteamGifts enter bot failed: %s" % exception, config=log_error)
 
     def show_entry_fields(self):
         print("First Name: %s" % (self.entry_chrome_profile_path.get()))
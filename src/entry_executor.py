@@ -0,0 +1,112 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from requests import ConnectTimeout, RequestException
+
+from src.log_colors import *
+
+
+class EntryExecutor:
+    def __init__(self, sg_bot, entry_config):
+        self.sg_bot = sg_bot
+        self.workers = entry_config.get("workers", 4)
+        self.retries = entry_config.get("retries", 2)
+
+        # The points of the dispatched entries are reserved until their response arrives.
+        self.points = sg_bot.profile["points"]
+        self.server_points = None
+        self.reserved = 0
+
+    def available_points(self):
+        # The server reports the points left after each entry, which may already include entries still in flight.
+        points = self.points if self.server_points is None else min(self.points, self.server_points)
+        return points - self.reserved
+
+    def run(self, giveaways):
+        # The giveaways may be a stream, they are only taken when there is a free worker.
+        started = time.time()
+        giveaways = iter(giveaways)
+        exhausted = False
+        pending = []
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                # Dispatch the giveaways in order while there is a free worker and we can afford them.
+                remaining = []
+                for giveaway in pending:
+                    if len(in_flight) < self.workers and giveaway["points"] <= self.available_points():
+                        self.dispatch(executor, in_flight, giveaway)
+                    else:
+                        remaining.append(giveaway)
+                pending = remaining
+                while not exhausted and len(in_flight) < self.workers and self.available_points() > 0:
+                    giveaway = next(giveaways, None)
+                    if giveaway is None:
+                        exhausted = True
+                    elif giveaway["points"] <= self.available_points():
+                        self.dispatch(executor, in_flight, giveaway)
+                    else:
+                        pending.append(giveaway)
+
+                # Only keep the giveaways that fit in the budget when the entries in flight would fail.
+                pending = [giveaway for giveaway in pending
+                           if giveaway["points"] <= self.available_points() + self.reserved]
+
+                # Stop as soon as nothing is in flight, the budget is exhausted or all giveaways are dispatched.
+                if not in_flight:
+                    break
+
+                # Handle the responses on this thread, so the points and the display are only updated here.
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    giveaway = in_flight.pop(future)
+                    self.reserved -= giveaway["points"]
+                    self.handle_entry(giveaway, *future.result())
+
+        self.sg_bot.display.log_console_text("Entered %i giveaways in %0.1fs." % (
+            self.sg_bot.stats["entered"], time.time() - started), config=log_verbose)
+
+    def dispatch(self, executor, in_flight, giveaway):
+        self.reserved += giveaway["points"]
+        in_flight[executor.submit(self.enter, giveaway)] = giveaway
+
+    def enter(self, giveaway):
+        # Retry the transient failures, the rate limiter slows down in between.
+        # Return the response and the error when the entry was sent, but its response was lost.
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                json_data = self.sg_bot.enter_giveaway(giveaway)
+            except ConnectTimeout:
+                json_data = None
+            except RequestException as error:
+                # The server may have entered the giveaway, thus it is not sent again.
+                return None, error
+            if json_data is not None or attempts > self.retries:
+                return json_data, None
+
+    def handle_entry(self, giveaway, json_data, lost_error):
+        if lost_error is not None:
+            # Hold the points of the entry, as it may have been entered.
+            self.points -= giveaway["points"]
+            self.sg_bot.display.log_console_text(
+                "Lost the response to the entry of %s, it may have been entered: %s" % (giveaway["name"], lost_error),
+                config=log_error)
+            return
+
+        if json_data is None:
+            self.sg_bot.display.log_console_text("Could not enter giveaway: %s" % giveaway["name"], config=log_error)
+            return
+
+        if json_data.get("type") != "success":
+            self.sg_bot.display.log_console_text("Could not enter giveaway: " + str(json_data), config=log_error)
+            return
+
+        # Reconcile the points with the points left according to the server.
+        self.points -= giveaway["points"]
+        if str(json_data.get("points", "")).isdigit():
+            server_points = int(json_data["points"])
+            self.server_points = server_points if self.server_points is None else min(self.server_points,
+                                                                                       server_points)
+        self.sg_bot.record_entry(giveaway, self.available_points() + self.reserved)
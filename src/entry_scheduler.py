@@ -0,0 +1,148 @@
+import bisect
+import time
+
+from src.entry_selector import EntrySelector
+from src.log_colors import *
+
+
+class PointModel:
+    def __init__(self, points_per_hour=24, max_points=400):
+        # The points are earned over time, up to a maximum.
+        self.points_per_hour = points_per_hour
+        self.max_points = max_points
+
+    def points_earned(self, seconds):
+        return self.points_per_hour * max(0, seconds) / 3600
+
+    def seconds_until(self, points, target):
+        # Return the seconds until we have the target points, None if we never will.
+        if points >= target:
+            return 0
+        if target > self.max_points or self.points_per_hour <= 0:
+            return None
+        return (target - points) / self.points_per_hour * 3600
+
+
+class EntryScheduler:
+    def __init__(self, sg_bot, scheduler_config):
+        self.sg_bot = sg_bot
+        self.account = sg_bot.profile["name"]
+        self.index = sg_bot.caches.candidates
+        self.selector = EntrySelector(sg_bot.config.get("selection", {}))
+        self.point_model = PointModel(scheduler_config.get("points_per_hour", 24),
+                                      scheduler_config.get("max_points", 400))
+
+        # Only the points earned within the horizon are planned with, giveaways are entered a margin before they end.
+        self.horizon = scheduler_config.get("horizon", 24 * 60 * 60)
+        self.margin = scheduler_config.get("margin", 5 * 60)
+
+        # The search pages are scanned again when the candidates are older than the rescan interval.
+        self.rescan_interval = scheduler_config.get("rescan_interval", 60 * 60)
+        self.min_interval = scheduler_config.get("min_interval", 5 * 60)
+        self.max_interval = scheduler_config.get("max_interval", 2 * 60 * 60)
+
+    def run(self):
+        # Enter the planned giveaways that are due and return when the next run should start.
+        now = time.time()
+        candidates = self.load_candidates(now)
+        plan = self.plan(candidates, now)
+        due = self.due_entries(plan)
+        self.sg_bot.display.log_console_text(
+            "\nPlanned %i of %i candidates for %iP, entering %i now." % (
+                len(plan), len(candidates), sum(giveaway["points"] for giveaway in plan), len(due)),
+            config=log_verbose)
+        self.sg_bot.enter_giveaways(due)
+
+        # Forget the entered giveaways, the others stay planned for the next runs.
+        entered = self.sg_bot.caches.entered.filter_entered(self.account, [giveaway["giveaway_id"] for giveaway in due])
+        self.index.remove(self.account, entered)
+        next_run_at = self.next_run_at([giveaway for giveaway in plan if giveaway["giveaway_id"] not in entered],
+                                       time.time())
+        self.sg_bot.display.log_console_text(
+            "Next run at %s." % time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(next_run_at)), config=log_verbose)
+        return next_run_at
+
+    def open_candidates(self):
+        # The indexed giveaways that did not end and were not entered meanwhile, e.g. by hand.
+        candidates = self.index.get_open(self.account)
+        entered = self.sg_bot.caches.entered.filter_entered(
+            self.account, [giveaway["giveaway_id"] for giveaway in candidates])
+        return [giveaway for giveaway in candidates if giveaway["giveaway_id"] not in entered]
+
+    def load_candidates(self, now):
+        # Only scan the search pages when the index is outdated or holds less than we can spend.
+        candidates = self.open_candidates()
+        last_scan = self.index.last_scan(self.account)
+        if last_scan is not None and now - last_scan < self.rescan_interval and \
+                sum(giveaway["points"] for giveaway in candidates) >= self.sg_bot.profile["points"]:
+            self.sg_bot.display.log_console_text(
+                "\nPlanning with %i indexed giveaways, the search pages were scanned %i minutes ago." % (
+                    len(candidates), (now - last_scan) / 60), config=log_verbose)
+            return candidates
+
+        self.index.put_many(self.account, list(self.sg_bot.stream_giveaways()))
+        return self.open_candidates()
+
+    def deadline(self, giveaway, now):
+        # The time the giveaway has to be entered by, the giveaways ending after the horizon can wait.
+        if giveaway.get("end_time") is None:
+            return now + self.horizon
+        return min(giveaway["end_time"] - self.margin, now + self.horizon)
+
+    def plan(self, candidates, now):
+        # Select the most valuable giveaways we can pay within the horizon, like a normal run does.
+        points = self.sg_bot.profile["points"]
+        values = {giveaway["giveaway_id"]: self.selector.value(giveaway, now) for giveaway in candidates}
+        candidates = [giveaway for giveaway in candidates
+                      if values[giveaway["giveaway_id"]] > 0 and self.deadline(giveaway, now) >= now]
+        selected, _ = self.selector.select(candidates, points + self.point_model.points_earned(self.horizon))
+        selected_ids = set(giveaway["giveaway_id"] for giveaway in selected)
+
+        # Plan the selected giveaways first and then the others, each by value per point, as long as all planned
+        # giveaways can still be paid before their deadline with the points we have and the points we earn meanwhile.
+        planned = []
+        deadlines = []
+        for giveaway in sorted(candidates, key=lambda candidate: (
+                candidate["giveaway_id"] not in selected_ids,
+                -values[candidate["giveaway_id"]] / max(candidate["points"], 1))):
+            # Check the points spent by each deadline, with the giveaway inserted in deadline order.
+            deadline = self.deadline(giveaway, now)
+            index = bisect.bisect_right(deadlines, deadline)
+            candidate_plan = planned[:index] + [giveaway] + planned[index:]
+            candidate_deadlines = deadlines[:index] + [deadline] + deadlines[index:]
+            spent = 0
+            for planned_giveaway, planned_deadline in zip(candidate_plan, candidate_deadlines):
+                spent += planned_giveaway["points"]
+                if spent > points + self.point_model.points_earned(planned_deadline - now):
+                    break
+            else:
+                planned, deadlines = candidate_plan, candidate_deadlines
+        return planned
+
+    def due_entries(self, plan):
+        # Enter the planned giveaways in deadline order while we can pay them, the points for the others are held.
+        # Entering a later giveaway first could leave too few points for a giveaway that ends sooner.
+        points = self.sg_bot.profile["points"]
+        due = []
+        for giveaway in plan:
+            if giveaway["points"] > points:
+                break
+            due.append(giveaway)
+            points -= giveaway["points"]
+        return due
+
+    def next_run_at(self, remaining_plan, now):
+        # Wake up when we can pay the next planned giveaway, but before it ends.
+        points = self.sg_bot.profile["points"]
+        next_run_at = now + self.max_interval
+        if remaining_plan:
+            seconds = self.point_model.seconds_until(points, remaining_plan[0]["points"])
+            if seconds is not None:
+                next_run_at = min(next_run_at, now + seconds)
+            next_run_at = min(next_run_at, self.deadline(remaining_plan[0], now))
+
+        # Wake up before the points reach the maximum, the points earned beyond it are lost.
+        seconds = self.point_model.seconds_until(points, self.point_model.max_points)
+        if seconds is not None:
+            next_run_at = min(next_run_at, now + seconds)
+        return max(next_run_at, now + self.min_interval)
@@ -0,0 +1,128 @@
+import heapq
+import time
+
+
+class EntrySelector:
+    def __init__(self, selection_config):
+        self.mode = selection_config.get("mode", "knapsack")
+
+        # The weights of the value function.
+        weights = selection_config.get("weights", {})
+        self.rating_weight = weights.get("rating", 1.0)
+        self.win_chance_weight = weights.get("win_chance", 0.0)
+        self.time_left_weight = weights.get("time_left", 0.0)
+        self.points_weight = weights.get("points", 0.0)
+
+    def value(self, giveaway, now):
+        # The rating is the main value of a giveaway.
+        value = self.rating_weight * giveaway["rating"] / 100
+
+        # Giveaways with few entries per copy are more likely to be won.
+        if self.win_chance_weight and giveaway.get("entries") is not None:
+            value += self.win_chance_weight * giveaway.get("copies", 1) / (giveaway["entries"] + 1)
+
+        # Giveaways that end soon can not be entered on a later run.
+        if self.time_left_weight and giveaway.get("end_time") is not None:
+            hours_left = max(0, giveaway["end_time"] - now) / 3600
+            value += self.time_left_weight / (1 + hours_left)
+
+        # More expensive games can be worth more.
+        value += self.points_weight * giveaway["points"] / 50
+        return value
+
+    def select(self, giveaways, budget):
+        # Return the giveaways to enter within the budget, the most valuable first.
+        now = time.time()
+        values = [self.value(giveaway, now) for giveaway in giveaways]
+
+        if self.mode == "greedy":
+            selected = select_greedy(giveaways, budget)
+        else:
+            selected = select_knapsack([giveaway["points"] for giveaway in giveaways], values, budget)
+
+        selected.sort(key=lambda index: -values[index])
+        return [giveaways[index] for index in selected], sum(values[index] for index in selected)
+
+
+def expected_value(giveaway):
+    # The chance to win a copy, weighted by the rating, per spent point.
+    win_chance = giveaway.get("copies", 1) / (giveaway["entries"] + 1) if giveaway.get("entries") is not None else 0
+    return win_chance * giveaway["rating"] / 100 / max(giveaway["points"], 1)
+
+
+def select_stream(candidates, selector, select_rest, top_k=50, enter_value_per_point=0.08):
+    # Yield the giveaways that are worth their points as soon as they are found, of the others only the best are kept
+    # for the end. The value is taken per point, like the selection does, so cheap giveaways are not crowded out.
+    kept = []
+    for index, giveaway in enumerate(candidates):
+        value_per_point = selector.value(giveaway, time.time()) / max(giveaway["points"], 1)
+        if value_per_point >= enter_value_per_point:
+            yield giveaway
+            continue
+
+        # Drop the least valuable giveaway when there are more than top_k.
+        heapq.heappush(kept, (value_per_point, index, giveaway))
+        if len(kept) > top_k:
+            heapq.heappop(kept)
+
+    # Select from the kept giveaways with the points that are left.
+    yield from select_rest([giveaway for _, _, giveaway in sorted(kept, reverse=True)])
+
+
+def select_greedy(giveaways, budget):
+    # Take the giveaways in the given order, skipping the ones we can not afford anymore.
+    selected = []
+    for index, giveaway in enumerate(giveaways):
+        if giveaway["points"] <= budget:
+            selected.append(index)
+            budget -= giveaway["points"]
+    return selected
+
+
+def select_knapsack(costs, values, budget):
+    # Return the indices with the maximum total value within the budget (exact 0/1 knapsack).
+    budget = max(0, int(budget))
+
+    # Group the giveaways by cost, of each group only the most valuable ones are ever taken.
+    # There are only a few distinct costs, thus this scales with the budget instead of the amount of giveaways.
+    selected = []
+    groups = {}
+    for index, (cost, value) in enumerate(zip(costs, values)):
+        if value <= 0 or cost > budget:
+            continue
+        if cost <= 0:
+            selected.append(index)
+            continue
+        groups.setdefault(cost, []).append(index)
+
+    group_items = []
+    for cost, indices in groups.items():
+        indices.sort(key=lambda index: -values[index])
+        indices = indices[:budget // cost]
+        prefix = [0.0]
+        for index in indices:
+            prefix.append(prefix[-1] + values[index])
+        group_items.append((cost, indices, prefix))
+
+    # The best value for each amount of spent points, and the amount taken of each group.
+    best = [0.0] * (budget + 1)
+    taken = []
+    for cost, indices, prefix in group_items:
+        new_best = best[:]
+        group_taken = [0] * (budget + 1)
+        for capacity in range(cost, budget + 1):
+            for count in range(1, min(len(indices), capacity // cost) + 1):
+                candidate = best[capacity - count * cost] + prefix[count]
+                if candidate > new_best[capacity]:
+                    new_best[capacity] = candidate
+                    group_taken[capacity] = count
+        best = new_best
+        taken.append(group_taken)
+
+    # Walk back through the groups to find the taken giveaways.
+    capacity = max(range(budget + 1), key=lambda spent: (best[spent], -spent))
+    for (cost, indices, prefix), group_taken in zip(reversed(group_items), reversed(taken)):
+        count = group_taken[capacity]
+        selected.extend(indices[:count])
+        capacity -= count * cost
+    return selected
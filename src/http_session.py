@@ -0,0 +1,73 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HttpSession(requests.Session):
+    def __init__(self, pool_connections=10, pool_maxsize=10, retries=3, backoff_factor=0.5, rate_limiter=None,
+                 metrics=None, timeout=30):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+
+        # A stalled connection raises after the timeout in seconds, instead of blocking a worker forever.
+        self.timeout = timeout
+
+        # Count the requests of all threads, including the rating lookups.
+        self.requests = 0
+        self.requests_lock = threading.Lock()
+
+        # Retry throttled and failed requests with an exponential backoff, honoring the Retry-After header.
+        # Only the idempotent requests are retried once they were sent, an entry is not sent twice.
+        retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=Retry.DEFAULT_ALLOWED_METHODS, respect_retry_after_header=True,
+                      raise_on_status=False)
+
+        # Keep the connections of each host alive in a pool, so they are reused between requests.
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        # Wait for the rate limit of the host.
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        kwargs.setdefault("timeout", self.timeout)
+        with self.requests_lock:
+            self.requests += 1
+        started = time.monotonic()
+        response = super().request(method, url, *args, **kwargs)
+        elapsed = time.monotonic() - started
+
+        # Let the limiter adapt to how the host responds, and record the request.
+        if self.rate_limiter is not None:
+            self.rate_limiter.report(url, response, elapsed)
+        if self.metrics is not None:
+            self.metrics.observe_request(url, method, response.status_code, elapsed)
+        return response
+
+    def set_session_cookie(self, phpsessid, domain="www.steamgifts.com"):
+        self.cookies.set("PHPSESSID", phpsessid, domain=domain)
+
+    def connection_stats(self):
+        # Collect the amount of requests and opened connections of each host pool.
+        stats = {}
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for pool_key in pools.keys():
+                pool = pools[pool_key]
+                host_stats = stats.setdefault(pool.host, dict(requests=0, connections=0))
+                host_stats["requests"] += pool.num_requests
+                host_stats["connections"] += pool.num_connections
+        return stats
+
+    def stats_text(self):
+        lines = []
+        for host, host_stats in sorted(self.connection_stats().items()):
+            lines.append(" - %s: %i requests over %i connections (%i reused)" % (
+                host, host_stats["requests"], host_stats["connections"],
+                max(0, host_stats["requests"] - host_stats["connections"])))
+        return "\n".join(lines)
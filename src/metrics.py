@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+class Histogram:
+    # The upper bounds of the buckets in seconds, from a fast cache hit to a throttled request.
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+                break
+
+
+class Metrics:
+    def __init__(self, prefix="steamgifts", labels=None):
+        # The labels are added to all metrics, e.g. the account.
+        self.prefix = prefix
+        self.labels = dict(labels or {})
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def key(self, name, labels):
+        merged = dict(self.labels)
+        merged.update(labels or {})
+        return name, tuple(sorted(merged.items()))
+
+    def increment(self, name, labels=None, value=1):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, labels=None):
+        with self.lock:
+            self.gauges[self.key(name, labels)] = value
+
+    def observe(self, name, value, labels=None):
+        key = self.key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def time(self, stage):
+        # Time a stage of the run, also when it fails.
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - started, dict(stage=stage))
+
+    def observe_request(self, url, method, status, seconds):
+        host = urlsplit(url).hostname or url
+        self.increment("http_requests_total", dict(host=host, method=method, status=str(status)))
+        self.observe("http_request_seconds", seconds, dict(host=host, method=method))
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            for metrics_type, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+                for (name, labels), value in sorted(metrics.items()):
+                    self.add_type_line(lines, name, metrics_type)
+                    lines.append("%s %s" % (self.metric_name(name, labels), format_value(value)))
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                self.add_type_line(lines, name, "histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else format_value(bound)
+                    lines.append("%s %i" % (self.metric_name(name + "_bucket", labels + (("le", le),)), cumulative))
+                lines.append("%s %s" % (self.metric_name(name + "_sum", labels), format_value(histogram.sum)))
+                lines.append("%s %i" % (self.metric_name(name + "_count", labels), histogram.count))
+        return "\n".join(lines) + "\n"
+
+    def add_type_line(self, lines, name, metrics_type):
+        # Each metric is preceded by its type once.
+        type_line = "# TYPE %s_%s %s" % (self.prefix, name, metrics_type)
+        if type_line not in lines:
+            lines.append(type_line)
+
+    def json_lines(self):
+        timestamp = time.time()
+        lines = []
+        with self.lock:
+            for metrics_type, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+                for (name, labels), value in sorted(metrics.items()):
+                    lines.append(dict(timestamp=timestamp, metric=self.prefix + "_" + name, type=metrics_type,
+                                      labels=dict(labels), value=value))
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                lines.append(dict(timestamp=timestamp, metric=self.prefix + "_" + name, type="histogram",
+                                  labels=dict(labels), count=histogram.count, sum=histogram.sum, max=histogram.max))
+        return "".join(json.dumps(line) + "\n" for line in lines)
+
+    def write(self, path, metrics_format="prometheus"):
+        # A prometheus file is replaced on each run, json lines are appended.
+        if metrics_format == "json":
+            with open(path, "a") as f:
+                f.write(self.json_lines())
+        else:
+            with open(path, "w") as f:
+                f.write(self.prometheus_text())
+
+    def summary_text(self):
+        # Summarize where the time of the run went.
+        lines = []
+        with self.lock:
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                label_text = ", ".join("%s=%s" % (key, value) for key, value in labels if key not in self.labels)
+                lines.append(" - %s{%s}: %i times, %0.2fs total, %0.3fs avg, %0.3fs max" % (
+                    name, label_text, histogram.count, histogram.sum, histogram.sum / max(histogram.count, 1),
+                    histogram.max))
+        return "\n".join(lines)
+
+    def metric_name(self, name, labels):
+        if not labels:
+            return self.prefix + "_" + name
+        return "%s_%s{%s}" % (self.prefix, name, ",".join(
+            '%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"')) for key, value in labels))
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,82 @@
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cache import Caches
+from src.console_display import ConsoleDisplay
+from src.log_colors import *
+from src.rate_limiter import AdaptiveRateLimiter
+from src.steamGifts import SteamGifts
+
+
+def merge_config(base, overrides):
+    # Merge the account specific settings into a copy of the base config.
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class MultiAccountRunner:
+    def __init__(self, accounts_config):
+        # Load the base config, shared by all accounts.
+        with open(accounts_config.get("base_config", "config.json")) as f:
+            base_config = json.load(f)
+        self.accounts = []
+        for account in accounts_config["accounts"]:
+            # Each account needs its own stored session.
+            account.setdefault("session", {}).setdefault("path", "session-%s.json" % account["name"])
+            self.accounts.append(merge_config(base_config, account))
+        self.parallel_accounts = accounts_config.get("parallel_accounts", 4)
+
+        # The caches and the global rate limit are shared by all accounts.
+        self.caches = Caches(base_config.get("cache", {}))
+        global_requests_per_second = accounts_config.get("global_requests_per_second", 4)
+        self.global_rate_limiter = AdaptiveRateLimiter(dict(requests_per_second=global_requests_per_second,
+                                                            max_requests_per_second=global_requests_per_second))
+        self.display = ConsoleDisplay()
+
+    def run(self):
+        # Interleave the accounts, each account runs on its own thread.
+        with ThreadPoolExecutor(max_workers=self.parallel_accounts) as executor:
+            summaries = list(executor.map(self.run_account, self.accounts))
+
+        self.report(summaries)
+        self.caches.close()
+        return summaries
+
+    def run_account(self, account_config):
+        name = account_config["name"]
+        display = ConsoleDisplay("[%s] " % name)
+        try:
+            summary = SteamGifts(account_config, display, caches=self.caches,
+                                 global_rate_limiter=self.global_rate_limiter).run()
+        except Exception as exception:
+            # A failing account should not stop the other accounts.
+            display.log_console_text("Account failed: %s" % exception, log_error)
+            summary = dict(status="failed", error=str(exception), duration=0, requests=0, candidates=0, skipped=0,
+                           entered=0, points_spent=0, rate_limit_wait=0)
+        summary["name"] = name
+        return summary
+
+    def report(self, summaries):
+        self.display.log_console_text("\nAccount throughput:")
+        for summary in summaries:
+            minutes = max(summary["duration"], 1) / 60
+            self.display.log_console_text(
+                " - %s (%s): %i entered for %iP, %i requests in %0.1fs (%0.1f entries/min, %0.1f requests/min)" % (
+                    summary["name"], summary["status"], summary["entered"], summary["points_spent"],
+                    summary["requests"], summary["duration"], summary["entered"] / minutes,
+                    summary["requests"] / minutes))
+        self.display.log_console_text("Shared cache usage:\n" + self.caches.stats_text())
+
+
+# Run all accounts of an accounts file, e.g. `python -m src.multi_account accounts.json`.
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    with open(sys.argv[1] if len(sys.argv) > 1 else "accounts.json") as accounts_file:
+        MultiAccountRunner(json.load(accounts_file)).run()
@@ -0,0 +1,204 @@
+from collections import namedtuple
+from importlib.util import find_spec
+
+# The fields of a single giveaway row on a search page.
+GiveawayRow = namedtuple("GiveawayRow", ["name", "points", "href", "giveaway_id", "steam_url", "faded",
+                                         "copies", "entries", "end_time"], defaults=(1, None, None))
+
+
+class GiveawayPage:
+    def __init__(self, has_results, rows, total_results=None, last_page=None):
+        self.has_results = has_results
+        self.rows = rows
+
+        # The pagination of the search, None when the page does not show it.
+        self.total_results = total_results
+        self.last_page = last_page
+
+
+def available_backends():
+    # The C-backed parsers are optional, the slower html.parser is always available.
+    # The parsers are only looked up here, they are imported on their first use to keep the startup fast.
+    backends = []
+    if find_spec("selectolax") is not None and find_spec("selectolax.lexbor") is not None:
+        backends.append("selectolax")
+    if find_spec("lxml") is not None:
+        backends.append("lxml")
+    backends.append("html.parser")
+    return backends
+
+
+def get_page_parser(backend="auto"):
+    # Use the fastest parser that is installed.
+    if backend == "auto":
+        backend = available_backends()[0]
+    if backend not in available_backends():
+        raise ValueError("HTML parser backend '%s' is not available, use one of %s" % (backend, available_backends()))
+
+    if backend == "selectolax":
+        return parse_page_selectolax
+    if backend == "lxml":
+        return parse_page_lxml
+    return parse_page_soup
+
+
+def create_row(name, thin_texts, href, steam_url, faded, entries_text, end_timestamp):
+    # The points are shown as "(15P)", multiple copies as "(3 Copies)" in front of it.
+    copies = 1
+    if len(thin_texts) > 1 and "Cop" in thin_texts[0]:
+        copies = int(thin_texts[0][1:].split(" ")[0].replace(",", ""))
+
+    # The entries are shown as "1,234 entries".
+    entries = None
+    if entries_text is not None:
+        entries = int(entries_text.split(" ")[0].replace(",", ""))
+
+    return GiveawayRow(name=name, points=int(thin_texts[-1][1:-2]), href=href, giveaway_id=href.split("/")[2],
+                       steam_url=steam_url, faded=faded, copies=copies, entries=entries,
+                       end_time=int(end_timestamp) if end_timestamp else None)
+
+
+def parse_pagination(result_texts, page_numbers):
+    # The results are shown as "Displaying 1 to 50 of 1,234 results", the navigation links to the last page.
+    total_results = int(result_texts[-1].replace(",", "")) if result_texts else None
+    last_page = max(int(page_number) for page_number in page_numbers) if page_numbers else None
+    return total_results, last_page
+
+
+def raise_not_a_search_page():
+    # Without the giveaway list the page is e.g. an error, maintenance or login page, which must not count as results.
+    raise ValueError("The page is not a search page, the site may be down or the session logged out")
+
+
+def is_entries_text(text):
+    return text.endswith(" entries") or text.endswith(" entry")
+
+
+def parse_page_selectolax(html):
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(html)
+
+    # Check if the site give a no-results page.
+    if tree.css_first("div.pagination--no-results") is not None:
+        return GiveawayPage(False, [], 0)
+
+    # The giveaways are inside the second class-less div, the other divs hold e.g. the pinned giveaways.
+    outer_list = tree.css_first("div.widget-container > div:not([class])")
+    giveaway_list = None if outer_list is None else next(
+        (child for child in outer_list.iter() if child.tag == "div" and "class" not in child.attributes), None)
+    total_results, last_page = parse_pagination(
+        [node.text() for node in tree.css("div.pagination__results strong")],
+        [node.attributes["data-page-number"] for node in tree.css("div.pagination__navigation a[data-page-number]")])
+    if giveaway_list is None:
+        raise_not_a_search_page()
+
+    rows = []
+    for row in giveaway_list.css("div.giveaway__row-inner-wrap"):
+        name = href = steam_url = entries_text = end_timestamp = None
+        thin_texts = []
+
+        # Extract all the fields in a single walk over the row.
+        for node in row.traverse():
+            classes = (node.attributes.get("class") or "").split()
+            if node.tag == "a" and "giveaway__heading__name" in classes:
+                name, href = node.text(), node.attributes["href"]
+            elif node.tag == "span" and "giveaway__heading__thin" in classes:
+                thin_texts.append(node.text())
+            elif node.tag == "a" and "giveaway__icon" in classes and steam_url is None:
+                steam_url = node.attributes.get("href")
+            elif node.tag == "span" and end_timestamp is None and "data-timestamp" in node.attributes:
+                end_timestamp = node.attributes["data-timestamp"]
+            elif node.tag == "span" and entries_text is None and is_entries_text(node.text()):
+                entries_text = node.text()
+        rows.append(create_row(name, thin_texts, href, steam_url, "is-faded" in row.attributes["class"].split(),
+                               entries_text, end_timestamp))
+    return GiveawayPage(True, rows, total_results, last_page)
+
+
+def parse_page_lxml(html):
+    import lxml.html
+    tree = lxml.html.fromstring(html)
+
+    # Check if the site give a no-results page.
+    if tree.xpath('//div[contains(concat(" ", @class, " "), " pagination--no-results ")]'):
+        return GiveawayPage(False, [], 0)
+
+    # The giveaways are inside the second class-less div, the other divs hold e.g. the pinned giveaways.
+    giveaway_lists = tree.xpath(
+        '//div[contains(concat(" ", @class, " "), " widget-container ")]/div[not(@class)][1]/div[not(@class)][1]')
+    total_results, last_page = parse_pagination(
+        tree.xpath('//div[contains(concat(" ", @class, " "), " pagination__results ")]/strong/text()'),
+        tree.xpath('//div[contains(concat(" ", @class, " "), " pagination__navigation ")]/a/@data-page-number'))
+    if not giveaway_lists:
+        raise_not_a_search_page()
+
+    rows = []
+    for row in giveaway_lists[0].xpath('.//div[contains(concat(" ", @class, " "), " giveaway__row-inner-wrap ")]'):
+        name = href = steam_url = entries_text = end_timestamp = None
+        thin_texts = []
+
+        # Extract all the fields in a single walk over the row.
+        for node in row.iter("a", "span"):
+            classes = (node.get("class") or "").split()
+            if node.tag == "a" and "giveaway__heading__name" in classes:
+                name, href = node.text_content(), node.get("href")
+            elif node.tag == "span" and "giveaway__heading__thin" in classes:
+                thin_texts.append(node.text_content())
+            elif node.tag == "a" and "giveaway__icon" in classes and steam_url is None:
+                steam_url = node.get("href")
+            elif node.tag == "span" and end_timestamp is None and node.get("data-timestamp"):
+                end_timestamp = node.get("data-timestamp")
+            elif node.tag == "span" and entries_text is None and is_entries_text(node.text_content()):
+                entries_text = node.text_content()
+        rows.append(create_row(name, thin_texts, href, steam_url, "is-faded" in row.get("class").split(),
+                               entries_text, end_timestamp))
+    return GiveawayPage(True, rows, total_results, last_page)
+
+
+def parse_page_soup(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Check if the site give a no-results page.
+    if soup.find("div", {"class": "pagination--no-results"}) is not None:
+        return GiveawayPage(False, [], 0)
+
+    # The giveaways are inside the second class-less div, the other divs hold e.g. the pinned giveaways.
+    container = soup.find("div", "widget-container")
+    outer_list = None if container is None else container.find(has_no_class, recursive=False)
+    giveaway_list = None if outer_list is None else outer_list.find(has_no_class, recursive=False)
+    results = soup.find("div", "pagination__results")
+    navigation = soup.find("div", "pagination__navigation")
+    total_results, last_page = parse_pagination(
+        [] if results is None else [node.text for node in results.find_all("strong")],
+        [] if navigation is None else [node["data-page-number"] for node in
+                                       navigation.find_all("a", attrs={"data-page-number": True})])
+    if giveaway_list is None:
+        raise_not_a_search_page()
+
+    rows = []
+    for row in giveaway_list.find_all("div", "giveaway__row-inner-wrap"):
+        name = href = steam_url = entries_text = end_timestamp = None
+        thin_texts = []
+
+        # Extract all the fields in a single walk over the row.
+        for node in row.find_all(["a", "span"]):
+            classes = node.get("class") or []
+            if node.name == "a" and "giveaway__heading__name" in classes:
+                name, href = node.text, node["href"]
+            elif node.name == "span" and "giveaway__heading__thin" in classes:
+                thin_texts.append(node.text)
+            elif node.name == "a" and "giveaway__icon" in classes and steam_url is None:
+                steam_url = node.get("href")
+            elif node.name == "span" and end_timestamp is None and node.get("data-timestamp"):
+                end_timestamp = node["data-timestamp"]
+            elif node.name == "span" and entries_text is None and is_entries_text(node.text):
+                entries_text = node.text
+        rows.append(create_row(name, thin_texts, href, steam_url, "is-faded" in row["class"], entries_text,
+                               end_timestamp))
+    return GiveawayPage(True, rows, total_results, last_page)
+
+
+# A function to retrieve a tag without an class.
+def has_no_class(tag):
+    return tag.name == "div" and not tag.has_attr('class')
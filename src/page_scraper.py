@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from src.log_colors import *
+
+
+class PageScraper:
+    # Fetches the search pages of several levels at once, each fetch is keyed by its (level, page).
+    def __init__(self, sg_bot, parsed_entries, use_query, min_total_points, workers):
+        self.sg_bot = sg_bot
+        self.parsed_entries = parsed_entries
+        self.use_query = use_query
+        self.min_total_points = min_total_points
+
+        # Give up on the retrieval after this many failed pages in a row, e.g. when the site is down.
+        self.max_failures = max(1, sg_bot.config.get("scraper", {}).get("max_failures", 3))
+        self.failures = 0
+
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.fetches = {}
+
+    def target_reached(self):
+        return self.parsed_entries["totalPoints"] >= self.min_total_points
+
+    def wait_for_target(self):
+        # Do not fetch more pages while the pending ratings could already reach the target.
+        self.sg_bot.wait_for_ratings(self.parsed_entries, self.min_total_points)
+        return self.target_reached()
+
+    def level_text(self, level):
+        return str(level)
+
+    def fetch_page(self, level, page):
+        # The session only waits for the rate limit of the host.
+        return self.sg_bot.get_giveaway_page(level, page, self.use_query)
+
+    def submit(self, key):
+        self.fetches[key] = self.executor.submit(self.fetch_page, *key)
+
+    def fetched_page(self, key):
+        # Return the page of a finished fetch, None when it failed.
+        try:
+            giveaway_page = self.fetches.pop(key).result()
+        except Exception as error:
+            self.sg_bot.display.log_console_text(
+                "Could not retrieve (level, page)=(%s, %i): %s" % (self.level_text(key[0]), key[1], error), log_error)
+
+            # Raise the error like the sync scraper does once the failures do not look transient anymore.
+            self.failures += 1
+            if self.failures >= self.max_failures:
+                raise
+            return None
+        self.failures = 0
+        return giveaway_page
+
+    def cancel_fetches(self, level=None, after_page=0):
+        # Cancel the fetches of the level after the given page, or all the fetches.
+        for key in [key for key in self.fetches if (level is None or key[0] == level) and key[1] > after_page]:
+            self.fetches.pop(key).cancel()
+
+    def close(self):
+        # Stop all the outstanding fetches once we have enough giveaways.
+        self.cancel_fetches()
+        self.executor.shutdown(wait=False, cancel_futures=True)
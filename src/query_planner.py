@@ -0,0 +1,123 @@
+import math
+from itertools import islice
+
+from src.log_colors import *
+from src.page_scraper import PageScraper
+
+
+class QueryPlanner(PageScraper):
+    # The amount of giveaways on a search page.
+    page_size = 50
+
+    def __init__(self, sg_bot, parsed_entries, use_query, min_total_points):
+        # Load the scraper settings, the planner fetches as many pages at once as the async scraper.
+        scraper_config = sg_bot.config.get("scraper", {})
+        self.workers = max(1, scraper_config.get("prefetch_pages", 3) * scraper_config.get("prefetch_levels", 2))
+        super().__init__(sg_bot, parsed_entries, use_query, min_total_points, self.workers)
+
+        # The totals of the levels are remembered per search, without the page and levels.
+        self.search = "&".join(sorted(param for param in sg_bot.search_params if param)) if use_query else ""
+        self.totals = sg_bot.caches.levels.get_totals(self.search)
+        self.ranges = self.plan_ranges()
+
+        # Keep track of the page count and the next page to parse of each range.
+        self.last_page = {}
+        for level_range in self.ranges:
+            levels = range(level_range[1], level_range[0] + 1)
+            if all(level in self.totals for level in levels):
+                self.last_page[level_range] = max(1, math.ceil(
+                    sum(self.totals[level] for level in levels) / self.page_size))
+        self.next_page = dict.fromkeys(self.ranges, 1)
+        self.finished = set()
+        self.pages_parsed = 0
+
+    def plan_ranges(self):
+        # Merge the adjacent levels, from the level of the profile down, while their giveaways fit on a single page.
+        ranges = []
+        level = self.sg_bot.profile["level"]
+        while level >= 0:
+            max_level = level
+            volume = self.totals.get(level)
+            while volume is not None and level > 0 and level - 1 in self.totals and \
+                    volume + self.totals[level - 1] <= self.page_size:
+                level -= 1
+                volume += self.totals[level]
+            ranges.append((max_level, level))
+            level -= 1
+
+        self.sg_bot.display.log_console_text(
+            "Planned level ranges: %s" % ", ".join(self.level_text(level_range) for level_range in ranges))
+        return ranges
+
+    def level_text(self, level_range):
+        max_level, min_level = level_range
+        return str(max_level) if max_level == min_level else "%i-%i" % (max_level, min_level)
+
+    def pages_needed(self):
+        # Estimate the pages that are still needed from the points found on the pages so far. Until a page yields any
+        # points, e.g. when all giveaways were seen before, there is nothing to estimate from and pages go one by one.
+        points = self.parsed_entries["totalPoints"] + self.sg_bot.rating_pipeline.pending_points
+        if not self.pages_parsed or points <= 0:
+            return 1
+        return max(1, min(self.workers, math.ceil((self.min_total_points - points) * self.pages_parsed / points)))
+
+    def upcoming_pages(self):
+        # The pages in the order they are parsed, a range without a known page count is paged until an empty page.
+        for level_range in self.ranges:
+            if level_range in self.finished:
+                continue
+            last_page = self.last_page.get(level_range, self.next_page[level_range])
+            for page in range(self.next_page[level_range], last_page + 1):
+                yield level_range, page
+
+    def fetch_page(self, level_range, page):
+        return self.sg_bot.get_giveaway_page(level_range[0], page, self.use_query, min_level=level_range[1])
+
+    def update_plan(self, level_range, page, giveaway_page):
+        # The pagination of the page tells how many pages the range has, which is remembered for the next runs.
+        # A no-results page after the first page only tells the range has less pages than planned.
+        if giveaway_page.total_results is not None and (giveaway_page.has_results or page == 1):
+            self.sg_bot.caches.levels.put(self.search, range(level_range[1], level_range[0] + 1),
+                                          giveaway_page.total_results)
+            self.last_page[level_range] = max(giveaway_page.last_page or 0,
+                                              math.ceil(giveaway_page.total_results / self.page_size))
+        self.next_page[level_range] = page + 1
+
+    def finish_range(self, level_range):
+        self.finished.add(level_range)
+        self.sg_bot.display.log_console_text(
+            "There were no more entries matching your search criteria for level %s, lower level for more results." %
+            self.level_text(level_range), log_warning)
+
+        # The pages of the range that are still in flight are not needed anymore.
+        self.cancel_fetches(level_range)
+
+    def iterate(self):
+        # Yield after each page, in the planned order.
+        try:
+            while not self.wait_for_target():
+                # Fetch the pages that are still needed to reach the target at once.
+                upcoming = list(islice(self.upcoming_pages(), self.pages_needed()))
+                if not upcoming:
+                    break
+                for key in upcoming:
+                    if key not in self.fetches:
+                        self.submit(key)
+
+                # Parse the pages in order, the fetching continues in the background.
+                # A page that could not be fetched is skipped, too many failures in a row raise.
+                level_range, page = upcoming[0]
+                giveaway_page = self.fetched_page(upcoming[0])
+                if giveaway_page is None:
+                    self.next_page[level_range] = page + 1
+                    continue
+                self.update_plan(level_range, page, giveaway_page)
+                self.pages_parsed += 1
+
+                # An empty page or a page with only known giveaways ends the range, as does its last page.
+                if not self.sg_bot.parse_giveaways_page(giveaway_page, self.parsed_entries, level_range[0], page) or \
+                        page >= self.last_page.get(level_range, page + 1):
+                    self.finish_range(level_range)
+                yield
+        finally:
+            self.close()
@@ -0,0 +1,149 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class RateLimiter:
+    def __init__(self, requests_per_second=2.0, parent=None):
+        # A parent limiter bounds the requests of multiple limiters together, e.g. of all accounts.
+        self.parent = parent
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0
+        self.next_slot = 0.0
+        self.total_wait = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Reserve the next free slot, the slots are spaced by the interval.
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+            wait = slot - now
+            self.total_wait += wait
+
+        # Wait outside the lock, so other threads can reserve the following slots.
+        if wait > 0:
+            time.sleep(wait)
+
+        # Also wait for a free slot of the parent.
+        if self.parent is not None:
+            wait += self.parent.acquire()
+        return wait
+
+
+class TokenBucket:
+    def __init__(self, requests_per_second=2.0, min_requests_per_second=0.2, max_requests_per_second=5.0, burst=2,
+                 jitter=0.2, slow_response=2.0):
+        self.rate = requests_per_second
+        self.min_rate = min_requests_per_second
+        self.max_rate = max(max_requests_per_second, requests_per_second)
+        self.burst = burst
+        self.jitter = jitter
+        self.slow_response = slow_response
+
+        # The bucket starts full, thus the first requests are not delayed.
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+        # Keep track of the limiter statistics.
+        self.requests = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Take a token, waiting for the bucket to refill when it is empty.
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+
+            # The requests that wait are spread out a bit, so they do not arrive in lockstep.
+            wait = max(0.0, -self.tokens / self.rate, self.paused_until - now)
+            if wait > 0:
+                wait += random.uniform(0, self.jitter / self.rate)
+            self.requests += 1
+            self.total_wait += wait
+
+        # Wait outside the lock, so other threads can take the following tokens.
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def slow_down(self, pause=0.0):
+        # Halve the rate when the host throttles us, and pause for the requested time.
+        with self.lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def report(self, elapsed):
+        with self.lock:
+            if elapsed > self.slow_response:
+                # A slow response is an early sign of pressure, back off a little.
+                self.rate = max(self.min_rate, self.rate * 0.8)
+            else:
+                # Carefully speed up while the host keeps up.
+                self.rate = min(self.max_rate, self.rate + 0.05 * self.max_rate)
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate_config=None, parent=None):
+        # Each host gets its own bucket, the default settings can be overridden per host.
+        self.rate_config = dict(rate_config or {})
+        self.host_configs = self.rate_config.pop("hosts", {})
+        self.parent = parent
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlsplit(url).hostname or url
+        with self.lock:
+            if host not in self.buckets:
+                bucket_config = dict(self.rate_config)
+                bucket_config.update(self.host_configs.get(host, {}))
+                self.buckets[host] = TokenBucket(**bucket_config)
+            return self.buckets[host]
+
+    def acquire(self, url):
+        wait = self.bucket(url).acquire()
+
+        # Also wait for a free slot of the parent, e.g. shared by all accounts.
+        if self.parent is not None:
+            wait += self.parent.acquire(url)
+        return wait
+
+    def report(self, url, response, elapsed):
+        # Throttled requests are retried by the session, thus also look at the retry history of the response.
+        retries = getattr(getattr(response, "raw", None), "retries", None)
+        statuses = [response.status_code] + [attempt.status for attempt in (retries.history if retries else ())]
+        if 429 in statuses or 503 in statuses:
+            retry_after = response.headers.get("Retry-After", "") if response.status_code in (429, 503) else ""
+            self.throttled(url, float(retry_after) if retry_after.isdigit() else 0.0)
+            return
+        self.bucket(url).report(elapsed)
+        if self.parent is not None:
+            self.parent.report(url, response, elapsed)
+
+    def throttled(self, url, pause=0.0):
+        # The host signals that we are too fast, e.g. with a 429 or an error response.
+        self.bucket(url).slow_down(pause)
+        if self.parent is not None:
+            self.parent.throttled(url, pause)
+
+    def total_wait(self):
+        return sum(bucket.total_wait for bucket in list(self.buckets.values()))
+
+    def current_rates(self):
+        return {host: bucket.rate for host, bucket in list(self.buckets.items())}
+
+    def stats_text(self):
+        lines = []
+        for host, bucket in sorted(list(self.buckets.items())):
+            lines.append(" - %s: %0.2f requests/s, %i requests, %i throttled, %0.1fs waited" % (
+                host, bucket.rate, bucket.requests, bucket.throttled, bucket.total_wait))
+        return "\n".join(lines)
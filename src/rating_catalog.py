@@ -0,0 +1,58 @@
+import csv
+import json
+
+from src.rate_limiter import RateLimiter
+
+steamspy_url = "https://steamspy.com/api.php"
+
+
+def fetch_reviews(session, appid, url=steamspy_url):
+    # Return the (positive, negative) reviews of the app, None if the app could not be loaded.
+    try:
+        app_details = session.get(url, params=dict(request="appdetails", appid=str(appid))).json()
+    except ValueError:
+        return None
+
+    # Apps without reviews have no review counts.
+    return int(app_details.get("positive") or 0), int(app_details.get("negative") or 0)
+
+
+def read_catalog_file(path):
+    # Read the reviews of a SteamSpy `all` dump (json) or a csv file with appid, positive and negative columns.
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            apps = list(csv.DictReader(f))
+        else:
+            apps = json.load(f)
+    if isinstance(apps, dict):
+        apps = [dict(app, appid=app.get("appid", appid)) for appid, app in apps.items()]
+    return [(str(app["appid"]), int(app.get("positive") or 0), int(app.get("negative") or 0)) for app in apps]
+
+
+def refresh_catalog(catalog, session, scorer, limit=None, url=steamspy_url):
+    # Download the reviews of the stale apps again, apps that could not be loaded keep their old score.
+    reviews = []
+    for appid in catalog.stale_appids(limit):
+        app_reviews = fetch_reviews(session, appid, url)
+        if app_reviews is not None:
+            reviews.append((appid,) + app_reviews)
+    return catalog.put_many(reviews, scorer)
+
+
+def download_catalog(catalog, session, scorer, pages=None, requests_per_minute=1, url=steamspy_url):
+    # Import the SteamSpy `all` dump, which is served in pages of 1000 apps and heavily rate limited.
+    rate_limiter = RateLimiter(requests_per_minute / 60)
+    imported = 0
+    page = 0
+    while pages is None or page < pages:
+        rate_limiter.acquire()
+        try:
+            apps = session.get(url, params=dict(request="all", page=str(page))).json()
+        except ValueError:
+            break
+        if not apps:
+            break
+        imported += catalog.put_many([(str(app.get("appid", appid)), int(app.get("positive") or 0),
+                                       int(app.get("negative") or 0)) for appid, app in apps.items()], scorer)
+        page += 1
+    return imported
@@ -0,0 +1,63 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from requests import RequestException
+
+
+class RatingPipeline:
+    def __init__(self, rate_function, workers=4):
+        self.rate_function = rate_function
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        # The ratings being resolved, so the same app is only looked up once at a time.
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+        # The rated giveaways, waiting to be consumed.
+        self.results = queue.Queue()
+        self.pending = 0
+        self.pending_points = 0
+
+    def submit(self, key, giveaway):
+        with self.lock:
+            self.pending += 1
+            self.pending_points += giveaway["points"]
+
+            # Share the lookup with the giveaways of the same app that are still being rated.
+            future = self.in_flight.get(key)
+            is_new_lookup = future is None
+            if is_new_lookup:
+                future = self.executor.submit(self.rate_function, key)
+                self.in_flight[key] = future
+
+        # The callbacks run directly when the lookup is already done, thus register them outside the lock.
+        if is_new_lookup:
+            future.add_done_callback(lambda done: self.release(key))
+        future.add_done_callback(lambda done: self.results.put((giveaway, done)))
+
+    def release(self, key):
+        with self.lock:
+            self.in_flight.pop(key, None)
+
+    def get(self, block=True):
+        # Retrieve a rated giveaway with the error of a failed lookup, None if there is nothing to consume.
+        try:
+            giveaway, future = self.results.get(block=block and self.pending > 0)
+        except queue.Empty:
+            return None
+
+        with self.lock:
+            self.pending -= 1
+            self.pending_points -= giveaway["points"]
+
+        # A failed request results in no rating, other errors are bugs and are raised.
+        error = future.exception()
+        if error is None:
+            return giveaway, future.result(), None
+        if isinstance(error, RequestException):
+            return giveaway, None, error
+        raise error
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
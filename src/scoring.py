@@ -0,0 +1,154 @@
+import math
+from importlib.util import find_spec
+
+# numpy is optional and slow to import, thus it is only imported for the first batch that is large enough.
+has_numpy = find_spec("numpy") is not None
+vectorize_min = 256
+
+
+def review_score(positive, negative):
+    # Pull the ratio of positive reviews towards 50%, the less reviews the stronger.
+    reviews_total = positive + negative
+    if reviews_total > 0:
+        reviews_score = positive / reviews_total
+        return (reviews_score - (reviews_score - 0.5) * 2 ** -math.log10(reviews_total + 1)) * 100
+
+    # Return 0, as there were no reviews found.
+    return 0
+
+
+def review_scores(positives, negatives):
+    # Score all the apps in one pass, vectorized when numpy is installed.
+    if not has_numpy or len(positives) < vectorize_min:
+        return [review_score(positive, negative) for positive, negative in zip(positives, negatives)]
+
+    import numpy
+    positives = numpy.asarray(positives, dtype=float)
+    reviews_total = positives + numpy.asarray(negatives, dtype=float)
+    reviews_score = numpy.divide(positives, reviews_total, out=numpy.zeros_like(positives), where=reviews_total > 0)
+    scores = (reviews_score - (reviews_score - 0.5) * 2 ** -numpy.log10(reviews_total + 1)) * 100
+    return numpy.where(reviews_total > 0, scores, 0).tolist()
+
+
+def wilson_score(positive, negative, z=1.96):
+    # The lower bound of the 95% confidence interval of the ratio of positive reviews.
+    reviews_total = positive + negative
+    if reviews_total > 0:
+        ratio = positive / reviews_total
+        center = ratio + z * z / (2 * reviews_total)
+        margin = z * math.sqrt((ratio * (1 - ratio) + z * z / (4 * reviews_total)) / reviews_total)
+        return (center - margin) / (1 + z * z / reviews_total) * 100
+    return 0
+
+
+def wilson_scores(positives, negatives, z=1.96):
+    if not has_numpy or len(positives) < vectorize_min:
+        return [wilson_score(positive, negative, z) for positive, negative in zip(positives, negatives)]
+
+    import numpy
+    positives = numpy.asarray(positives, dtype=float)
+    reviews_total = positives + numpy.asarray(negatives, dtype=float)
+    safe_total = numpy.maximum(reviews_total, 1)
+    ratio = positives / safe_total
+    center = ratio + z * z / (2 * safe_total)
+    margin = z * numpy.sqrt((ratio * (1 - ratio) + z * z / (4 * safe_total)) / safe_total)
+    scores = (center - margin) / (1 + z * z / safe_total) * 100
+    return numpy.where(reviews_total > 0, scores, 0).tolist()
+
+
+# The scoring models by name, each with its single and batch function.
+models = {
+    "dampened": (review_score, review_scores),
+    "wilson": (wilson_score, wilson_scores)
+}
+
+
+class Scorer:
+    def __init__(self, ratings_config):
+        self.model = ratings_config.get("model", "dampened")
+        if self.model not in models:
+            raise ValueError("Unknown rating model: %s, use one of %s" % (self.model, ", ".join(models)))
+        self.score_one, self.score_batch = models[self.model]
+
+        # Apps without any reviews get this score, instead of a score of the model.
+        self.unreviewed_score = ratings_config.get("unreviewed_score", 0)
+
+        # A bundle is rated by the mean of its apps, or weighted by the amount of reviews of each app.
+        self.bundle_model = ratings_config.get("bundle_model", "mean")
+
+        # The scores only depend on the amount of reviews, thus they are remembered by these amounts.
+        self.memo = {}
+        self.memo_entries = ratings_config.get("memo_entries", 200000)
+        self.hits = 0
+        self.misses = 0
+
+    def remember(self, reviews, score):
+        # Start over when the bound is reached, the scores are cheap to compute again.
+        if len(self.memo) >= self.memo_entries:
+            self.memo.clear()
+        self.memo[reviews] = score
+
+    def remember_stored(self, reviews, score, model):
+        # Take over a score that was stored by the same model, instead of computing it again.
+        reviews = (int(reviews[0]), int(reviews[1]))
+        if model == self.model and score is not None and sum(reviews) > 0 and reviews not in self.memo:
+            self.remember(reviews, score)
+
+    def load_stored(self, stored_scores):
+        # Take over the stored ((positive, negative), score, model) of many apps, the others are scored in one batch.
+        missing = []
+        for reviews, score, model in stored_scores:
+            if model == self.model:
+                self.remember_stored(reviews, score, model)
+            else:
+                missing.append(reviews)
+        self.score_many(missing)
+
+    def score(self, positive, negative):
+        reviews = (int(positive), int(negative))
+        if reviews[0] + reviews[1] == 0:
+            return self.unreviewed_score
+        score = self.memo.get(reviews)
+        if score is None:
+            self.misses += 1
+            score = self.score_one(*reviews)
+            self.remember(reviews, score)
+        else:
+            self.hits += 1
+        return score
+
+    def score_many(self, reviews):
+        # Score the (positive, negative) reviews of many apps, the unknown amounts in a single batch.
+        reviews = [(int(positive), int(negative)) for positive, negative in reviews]
+        reviewed = [review for review in reviews if sum(review) > 0]
+        missing = list({review for review in reviewed if review not in self.memo})
+        self.misses += len(missing)
+        self.hits += len(reviewed) - len(missing)
+        if missing:
+            scores = self.score_batch([positive for positive, _ in missing], [negative for _, negative in missing])
+            for review, score in zip(missing, scores):
+                self.remember(review, score)
+        return [self.memo[review] if sum(review) > 0 and review in self.memo else self.score(*review)
+                for review in reviews]
+
+    def bundle_score(self, app_reviews):
+        # The reviews of each app in the bundle, None for the apps that could not be loaded.
+        if not app_reviews:
+            return 0
+        known_reviews = [reviews for reviews in app_reviews if reviews is not None]
+        scores = self.score_many(known_reviews)
+
+        # Weigh each app by its amount of reviews, so the main game of a bundle counts the most.
+        if self.bundle_model == "weighted":
+            weights = [positive + negative for positive, negative in known_reviews]
+            if sum(weights) == 0:
+                return self.unreviewed_score if known_reviews else 0
+            return sum(score * weight for score, weight in zip(scores, weights)) / sum(weights)
+
+        # The apps that could not be loaded count as 0.
+        return sum(scores) / len(app_reviews)
+
+    def stats_text(self):
+        lookups = self.hits + self.misses
+        return "scores (%s): %i hits, %i misses (%0.1f%% hit rate)" % (
+            self.model, self.hits, self.misses, self.hits / lookups * 100 if lookups else 0)
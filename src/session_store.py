@@ -0,0 +1,55 @@
+import json
+import os
+import time
+
+
+class SessionStore:
+    def __init__(self, path="session.json"):
+        self.path = path
+
+    def load(self):
+        # Return the stored session, None if there is no (readable) session.
+        try:
+            with open(self.path) as f:
+                session = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not session.get("PHPSESSID"):
+            return None
+        return session
+
+    def save(self, phpsessid, xsrf_token):
+        # Only the current user may read the stored credentials.
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(dict(PHPSESSID=phpsessid, xsrf_token=xsrf_token, saved_at=time.time()), f)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class DriverStore:
+    def __init__(self, path="driver.json", ttl=7 * 24 * 60 * 60):
+        self.path = path
+        self.ttl = ttl
+
+    def load(self):
+        # Return the resolved driver path, None if it is missing, expired or removed.
+        try:
+            with open(self.path) as f:
+                driver = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not driver.get("path") or time.time() - driver.get("resolved_at", 0) > self.ttl or \
+                not os.path.exists(driver["path"]):
+            return None
+        return driver["path"]
+
+    def save(self, driver_path):
+        with open(self.path, "w") as f:
+            json.dump(dict(path=driver_path, resolved_at=time.time()), f)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
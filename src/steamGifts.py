@@ -1,113 +1,318 @@
-import math
-
-import steamspypi
-from selenium import webdriver
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import InvalidArgumentException
-import requests
-from bs4 import BeautifulSoup
-import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 import json
 import time
+from urllib.parse import urlsplit
+from src.async_scraper import AsyncPageScraper
+from src.cache import Caches
+from src.entry_executor import EntryExecutor
+from src.entry_scheduler import EntryScheduler
+from src.entry_selector import EntrySelector, expected_value, select_stream
+from src.http_session import HttpSession
+from src.metrics import Metrics
+from src.page_parser import GiveawayPage, GiveawayRow, get_page_parser
+from src.query_planner import QueryPlanner
+from src.rate_limiter import AdaptiveRateLimiter
+from src.rating_catalog import fetch_reviews
+from src.rating_pipeline import RatingPipeline
+from src.scoring import Scorer
+from src.session_store import DriverStore, SessionStore
 from src.log_colors import *
 
+
+def mask_secret(value):
+    # Only show the start of a secret, enough to tell sessions apart, short secrets are hidden completely.
+    value = str(value or "")
+    shown = min(4, len(value) // 4)
+    return value[:shown] + "*" * (len(value) - shown)
+
+
 class SteamGifts:
     base_url = "https://www.steamgifts.com/"
     base_search_url = base_url + "giveaways/search?"
+    store_url = "https://store.steampowered.com/"
+    steamspy_url = "https://steamspy.com/api.php"
     search_params = []
     cookie = {}
     profile = {}
     min_entries = 10
     points_threshold_no_query_search = 30
 
-    def __init__(self, config, display):
+    def __init__(self, config, display, caches=None, global_rate_limiter=None):
         # Load the config.
         self.config = config
         self.display = display
 
-        # Setup the driver, exit if the setup was not successful.
-        self.driver = self.setup_driver()
-        if self.driver is None:
-            return
+        # The sites can be replaced, e.g. by a local stand-in for the benchmarks.
+        urls = self.config.get("urls", {})
+        self.base_url = urls.get("steamgifts", self.base_url)
+        self.base_search_url = self.base_url + "giveaways/search?"
+        self.store_url = urls.get("store", self.store_url)
+        self.steamspy_url = urls.get("steamspy", self.steamspy_url)
+
+        # Open the persistent caches, unless they are shared with other accounts.
+        self.owns_caches = caches is None
+        self.caches = Caches(self.config.get("cache", {})) if self.owns_caches else caches
+
+        # The workers used to look up the ratings of multiple apps at once.
+        self.rating_executor = ThreadPoolExecutor(max_workers=self.config.get("ratings", {}).get("workers", 4))
+
+        # The model that turns the reviews of an app into its rating.
+        self.scorer = Scorer(self.config.get("ratings", {}))
+
+        # The parser used for the giveaway search pages.
+        self.parse_page = get_page_parser(self.config.get("scraper", {}).get("parser", "auto"))
+
+        # Time the stages and requests of the run, per account when running multiple accounts.
+        self.metrics = Metrics(labels=dict(account=self.config["name"]) if "name" in self.config else None)
+
+        # A single pooled http session shared by all the requests of the run, limited per host.
+        http_config = self.config.get("http", {})
+        self.rate_limiter = AdaptiveRateLimiter(self.config.get("rate_limit", {}), parent=global_rate_limiter)
+        self.session = HttpSession(pool_connections=http_config.get("pool_connections", 10),
+                                   pool_maxsize=http_config.get("pool_maxsize", 10),
+                                   retries=http_config.get("retries", 3),
+                                   backoff_factor=http_config.get("backoff_factor", 0.5),
+                                   rate_limiter=self.rate_limiter, metrics=self.metrics,
+                                   timeout=http_config.get("timeout", 30))
+
+        # Keep track of the work done during the run.
+        self.stats = dict(candidates=0, skipped=0, entered=0, points_spent=0)
+        self.driver = None
+        self.next_run_at = None
+
+    def run(self):
+        started = time.time()
+        try:
+            summary = self.run_entries(started)
+        finally:
+            # Close the browser and the session also when the run failed.
+            if self.driver is not None:
+                self.driver.close()
+                self.driver = None
+            self.close()
 
-        # Load the profile.
-        self.get_profile_info()
+        # Auto-close if option enabled.
+        if summary["status"] == "done" and self.config["settings"]["auto_quit"] == 1:
+            self.display.quit_application()
+        return summary
+
+    def run_entries(self, started):
+        # Load the profile over plain http when the stored session is still accepted.
+        session_config = self.config.get("session", {})
+        self.session_store = SessionStore(session_config.get("path", "session.json"))
+        with self.metrics.time("session_login"):
+            logged_in = session_config.get("mode", "cookie") == "cookie" and self.get_session_profile_info()
+        if not logged_in:
+            # Setup the driver, exit if the setup was not successful.
+            with self.metrics.time("driver_setup"):
+                self.driver = self.setup_driver()
+            if self.driver is None:
+                return self.export_metrics(self.summary(started, "login_failed"))
+
+            # Load the profile, the browser is not needed afterwards.
+            with self.metrics.time("browser_login"):
+                self.get_profile_info()
+            self.driver.close()
+            self.driver = None
 
         # Generate the search str.
         self.generate_search_url()
 
-        # Retrieve giveaways.
-        giveaways = self.retrieve_giveaways()
+        scheduler_config = self.config.get("scheduler", {})
+        if scheduler_config.get("enabled", False):
+            # Enter the giveaways that are due and plan when to run again.
+            with self.metrics.time("scheduled_entries"):
+                self.next_run_at = EntryScheduler(self, scheduler_config).run()
+        elif self.config.get("streaming", {}).get("enabled", False):
+            # Enter the giveaways while they are found.
+            with self.metrics.time("stream_giveaways"):
+                self.enter_streamed_giveaways()
+        else:
+            # Retrieve giveaways.
+            with self.metrics.time("retrieve_giveaways"):
+                giveaways = self.retrieve_giveaways()
 
-        # Enter the giveaways.
-        self.enter_giveaways(giveaways)
+            # Enter the giveaways, the most valuable selection within our points first.
+            with self.metrics.time("select_giveaways"):
+                selected = self.select_giveaways(giveaways)
+            with self.metrics.time("enter_giveaways"):
+                self.enter_giveaways(selected)
 
         # Show a completion message in the log.
         self.display.log_console_text("\nDone entering giveaways!", config=log_verbose)
-
-        # Close the driver.
-        self.driver.close()
-
-        # Auto-close if option enabled.
-        if self.config["settings"]["auto_quit"] == 1:
-            self.display.quit_application()
+        self.display.log_console_text("Cache usage:\n" + self.caches.stats_text() + "\n - " + self.scorer.stats_text())
+        self.display.log_console_text("Connection usage:\n" + self.session.stats_text())
+        self.display.log_console_text("Rate limits:\n" + self.rate_limiter.stats_text())
+        return self.export_metrics(self.summary(started, "done"))
+
+    def close(self):
+        # Close the session and the caches, shared caches are closed by their owner.
+        self.session.close()
+        self.rating_executor.shutdown()
+        if self.owns_caches:
+            self.caches.close()
+
+    def summary(self, started, status):
+        summary = dict(status=status, account=self.profile.get("name"), duration=time.time() - started,
+                       requests=self.session.requests)
+        summary.update(self.stats)
+        summary["rate_limit_wait"] = self.rate_limiter.total_wait()
+        if self.next_run_at is not None:
+            summary["next_run_at"] = self.next_run_at
+        return summary
+
+    def export_metrics(self, summary):
+        # Add the totals of the run to the timings.
+        for name in ("requests", "candidates", "skipped", "entered", "points_spent"):
+            self.metrics.set("run_" + name, summary[name])
+        self.metrics.set("run_duration_seconds", summary["duration"])
+        for cache in (self.caches.catalog, self.caches.ratings, self.caches.bundles, self.caches.pages,
+                      self.caches.seen):
+            self.metrics.set("cache_hits", cache.hits, dict(cache=cache.table))
+            self.metrics.set("cache_misses", cache.misses, dict(cache=cache.table))
+            self.metrics.set("cache_hit_ratio", cache.hit_rate(), dict(cache=cache.table))
+        for host, bucket in list(self.rate_limiter.buckets.items()):
+            self.metrics.set("rate_limit_wait_seconds", bucket.total_wait, dict(host=host))
+            self.metrics.set("rate_limit_requests_per_second", bucket.rate, dict(host=host))
+            self.metrics.set("rate_limit_throttled", bucket.throttled, dict(host=host))
+
+        # Show where the time went, and write the metrics file for the monitoring.
+        self.display.log_console_text("Timings:\n" + self.metrics.summary_text())
+        metrics_config = self.config.get("metrics", {})
+        if metrics_config.get("path"):
+            self.metrics.write(metrics_config["path"].format(account=self.config.get("name", summary["account"])),
+                               metrics_config.get("format", "prometheus"))
+        return summary
 
     def setup_driver(self):
+        # Selenium is only imported for a browser login, the slim build does not include it.
+        try:
+            from selenium import webdriver
+            from selenium.common.exceptions import InvalidArgumentException, SessionNotCreatedException
+        except ImportError:
+            self.display.log_console_text(
+                "Could not log in with the browser, selenium is not installed. Log in once with the full version " +
+                "to store the session.", log_error)
+            return None
+
+        options = webdriver.ChromeOptions()
+        options.add_argument('--user-data-dir={}'.format(self.config["chrome-profile-path"]))
+        driver_config = self.config.get("driver", {})
+        driver_store = DriverStore(driver_config.get("path", "driver.json"), driver_config.get("ttl", 7 * 24 * 60 * 60))
         try:
-            options = webdriver.ChromeOptions()
-            options.add_argument('--user-data-dir={}'.format(self.config["chrome-profile-path"]))
-            return webdriver.Chrome(ChromeDriverManager().install(), options=options)
+            try:
+                return webdriver.Chrome(self.resolve_driver_path(driver_store), options=options)
+            except SessionNotCreatedException:
+                # The stored driver does not match the updated browser anymore, resolve it again.
+                driver_store.clear()
+                return webdriver.Chrome(self.resolve_driver_path(driver_store), options=options)
         except InvalidArgumentException:
             self.display.log_console_text(
                 "Could not open a browser instance, make sure that all other chrome instances of the profile " +
                 "are closed before running the application.", log_error)
             return None
 
+    def resolve_driver_path(self, driver_store):
+        # Resolving the driver checks for a new version over the network, thus the resolved path is stored.
+        driver_path = driver_store.load()
+        if driver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver_path = ChromeDriverManager().install()
+            driver_store.save(driver_path)
+        return driver_path
+
     def get_soup(self, url):
-        # Do a random sleep before access.
-        time.sleep(float(random.randint(500, 1200)) / 1000)
+        # The browser shares the rate limit of the host with the http session.
+        self.rate_limiter.acquire(url)
         self.driver.implicitly_wait(30)
 
         # Get profile soup.
+        started = time.monotonic()
         self.driver.get(url)
+        self.rate_limiter.bucket(url).report(time.monotonic() - started)
 
         # Retrieve the html of the page as soup.
+        from bs4 import BeautifulSoup
         return BeautifulSoup(self.driver.page_source, "html.parser")
 
     def get_request_soup(self, url):
-        time.sleep(float(random.randint(500, 1200)) / 1000)
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(self.get_request_text(url), "html.parser")
 
-        page = requests.get(url, cookies=self.cookie)
-        return BeautifulSoup(page.text, "html.parser")
+    def get_request_text(self, url):
+        # The session waits for the rate limit of the host.
+        page = self.session.get(url)
+        return page.text
 
     def get_profile_info(self):
         # Get soup of main page.
         soup = self.get_soup(self.base_url)
 
         # Load the required cookie for requests.
-        print(self.driver.get_cookie("PHPSESSID")["value"])
         self.cookie = {
             'PHPSESSID': self.driver.get_cookie("PHPSESSID")["value"]
         }
+        self.session.set_session_cookie(self.cookie["PHPSESSID"], urlsplit(self.base_url).hostname)
 
         # Load the profile.
+        self.profile = self.parse_profile(soup)
+
+        # Store the session, so the next runs do not need the browser.
+        self.session_store.save(self.cookie["PHPSESSID"], self.profile["xsrf_token"])
+        self.show_profile()
+
+    def get_session_profile_info(self):
+        # Check if there is a session from an earlier browser login.
+        stored_session = self.session_store.load()
+        if stored_session is None:
+            return False
+
+        # Get soup of main page, using the stored cookie.
+        self.cookie = {
+            'PHPSESSID': stored_session["PHPSESSID"]
+        }
+        self.session.set_session_cookie(self.cookie["PHPSESSID"], urlsplit(self.base_url).hostname)
+        soup = self.get_request_soup(self.base_url)
+
+        # The session is rejected when the page does not show the profile, fall back to the browser.
+        profile = self.parse_profile(soup)
+        if profile is None:
+            self.display.log_console_text("The stored session was rejected, logging in with the browser.",
+                                          log_warning)
+            self.session.cookies.clear()
+            self.session_store.clear()
+            return False
+
+        # Load the profile.
+        self.profile = profile
+        self.show_profile()
+        return True
+
+    def parse_profile(self, soup):
+        # Return None if the page is not logged in.
         profile_container = soup.find("a", {"class": "nav__button nav__button--is-dropdown", "href": "/account"})
-        profile_spans = profile_container.findAll("span")
-        self.profile = dict(
+        if profile_container is None:
+            return None
+
+        profile_spans = profile_container.find_all("span")
+        return dict(
             points=int(profile_spans[0].text),
             level=int(profile_spans[1].text.split(" ")[1]),
             xsrf_token=soup.find("input", {"name": "xsrf_token"})["value"],
             name=soup.find("a", {"class": "nav__avatar-outer-wrap"})["href"].split("/")[-1]
         )
 
+    def show_profile(self):
         # Create the profile display.
         self.display.update_profile_display(self.profile)
 
-        # Log the profile to the GUI.
+        # Log the profile to the GUI, the session is a stored credential and the log may end up on a server.
         self.display.log_console_text("\nUser Profile:", log_verbose)
         self.display.log_console_text(" - PHPSESSID: %s\n - xsrf_token: %s\n - Level: %i\n - Points: %i" % (
-            self.cookie["PHPSESSID"], self.profile["xsrf_token"], self.profile["level"], self.profile["points"]))
+            mask_secret(self.cookie["PHPSESSID"]), mask_secret(self.profile["xsrf_token"]), self.profile["level"],
+            self.profile["points"]))
 
     def generate_search_url(self):
         # Log to the GUI console.
@@ -132,21 +337,95 @@ class SteamGifts:
         self.display.log_console_text("Search params: %s" % str(self.search_params))
 
     def retrieve_giveaways(self, use_query=True):
-        # Keep track of all the parsed entries.
-        parsed_entries = dict(entries=[], totalPoints=0)
+        # Collect all the giveaways that passed the filters.
+        giveaways = list(self.stream_giveaways(use_query))
+
+        # Sort the entries and return them to enter.
+        if self.config.get("selection", {}).get("rank", "rating") == "expected_value":
+            return sorted(giveaways, key=lambda row: (-row['expected_value'], -row['rating']))
+        return sorted(giveaways, key=lambda row: (-row['rating'], -row['points']))
+
+    def stream_giveaways(self, use_query=True):
+        # Keep track of the parsed entries, which are yielded as soon as they passed the filters.
+        parsed_entries = dict(entries=[], found=0, totalPoints=0)
         self.display.update_current_mining_display(0, 0)
-        self.display.current_session_entered.set("0")
+        self.display.update_entered_display(0)
 
         # Log the retrieval of giveaways to the console.
         self.display.log_console_text("\nRetrieving the giveaways to possible enter.", log_verbose)
         # Keep looping till we found enough entries.
+        min_retrieved_giveaway_total_points = max(200, self.profile["points"] * 3)
+
+        # Take over the stored scores of the rating catalog, the ratings are answered from memory afterwards.
+        # Only the apps scored by another model are scored again, in one batch.
+        if self.uses_catalog():
+            self.scorer.load_stored((reviews, score, model)
+                                    for reviews, _, score, model in self.caches.catalog.load().values())
+
+        # The ratings are resolved in the background while the next pages are fetched.
+        self.rating_pipeline = RatingPipeline(self.get_giveaway_score,
+                                              workers=self.config.get("ratings", {}).get("workers", 4))
+        pages = self.iterate_giveaway_pages(parsed_entries, use_query, min_retrieved_giveaway_total_points)
+        try:
+            for _ in pages:
+                yield from self.drain_entries(parsed_entries)
+
+            # Consume the ratings that are still being resolved.
+            while True:
+                yield from self.drain_entries(parsed_entries)
+                if not self.rating_pipeline.pending:
+                    break
+                self.consume_rated_giveaways(parsed_entries, block=True, limit=1)
+        finally:
+            pages.close()
+            self.rating_pipeline.shutdown()
+
+    def drain_entries(self, parsed_entries):
+        # Hand over the entries found since the last page, only the totals are kept.
+        entries = parsed_entries["entries"]
+        parsed_entries["entries"] = []
+        return entries
+
+    def iterate_giveaway_pages(self, parsed_entries, use_query, min_retrieved_giveaway_total_points):
+        # Plan the pages from the result totals when the planned scraper is enabled.
+        scraper_mode = self.config.get("scraper", {}).get("mode", "sync")
+        if scraper_mode == "planned":
+            yield from QueryPlanner(self, parsed_entries, use_query, min_retrieved_giveaway_total_points).iterate()
+            return
+
+        # Fetch multiple pages at once when the async scraper is enabled.
+        if scraper_mode != "async":
+            yield from self.retrieve_giveaway_pages(parsed_entries, use_query, min_retrieved_giveaway_total_points)
+            return
+
+        # Step through the pages of the async scraper, the fetches continue in the background in between.
+        scraper = AsyncPageScraper(self, parsed_entries, use_query, min_retrieved_giveaway_total_points)
+        loop = asyncio.new_event_loop()
+        pages = scraper.iterate()
+        try:
+            while True:
+                try:
+                    loop.run_until_complete(pages.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield
+        finally:
+            loop.run_until_complete(pages.aclose())
+            loop.close()
+
+    def retrieve_giveaway_pages(self, parsed_entries, use_query, min_retrieved_giveaway_total_points):
         current_page = 1
         current_level = self.profile["level"]
-        min_retrieved_giveaway_total_points = max(200, self.profile["points"] * 3)
 
         while current_level >= 0 and parsed_entries["totalPoints"] < min_retrieved_giveaway_total_points:  # TODO: Also do a min amount of page scrap.
+            # Do not fetch more pages while the pending ratings could already reach the target.
+            self.wait_for_ratings(parsed_entries, min_retrieved_giveaway_total_points)
+            if parsed_entries["totalPoints"] >= min_retrieved_giveaway_total_points:
+                break
+
             # Start the search for the given page.
             entries_found = self.retrieve_giveaways_page(parsed_entries, current_level, current_page, use_query)
+            yield
 
             # Stop if we mined all the pages, thus we lower the level we are querying.
             if not entries_found:
@@ -158,10 +437,7 @@ class SteamGifts:
             # Increment the page.
             current_page += 1
 
-        # Sort the entries and return them to enter.
-        return sorted(parsed_entries['entries'], key=lambda row: (-row['rating'], -row['points']))
-
-    def retrieve_paged_search_string(self, level, page, use_query):
+    def retrieve_paged_search_params(self, level, page, use_query, min_level=None):
         # Check if we use the search params.
         if use_query:
             # Create copy of search params and add page search param.
@@ -170,63 +446,184 @@ class SteamGifts:
             search_params_copy = []
 
         # Add the page search params.
-        search_params_copy.append("level_min=%s" % str(level))
+        search_params_copy.append("level_min=%s" % str(level if min_level is None else min_level))
         search_params_copy.append("level_max=%s" % str(level))
         search_params_copy.append("page=%s" % str(page))
+        return search_params_copy
 
+    def retrieve_paged_search_string(self, level, page, use_query):
         # Return the final search url.
-        return self.base_search_url + "&".join(search_params_copy)
+        return self.base_search_url + "&".join(self.retrieve_paged_search_params(level, page, use_query))
 
     def retrieve_giveaways_page(self, parsed_entries, level, page, use_query):
-        # Retrieve the soup of the current search with the given page
-        soup = self.get_request_soup(self.retrieve_paged_search_string(level, page, use_query))
+        # Retrieve the giveaways of the current search with the given page
+        giveaway_page = self.get_giveaway_page(level, page, use_query)
+        return self.parse_giveaways_page(giveaway_page, parsed_entries, level, page)
+
+    def get_giveaway_page(self, level, page, use_query, min_level=None):
+        # The same search gives the same rows for every account, except for the entered (faded) rows.
+        search = "&".join(sorted(
+            param for param in self.retrieve_paged_search_params(level, page, use_query, min_level) if param))
+        cached_page = self.caches.pages.get(search)
+        if cached_page is not None:
+            has_results, rows, total_results, last_page = cached_page
+            giveaway_rows = [GiveawayRow(*row) for row in rows]
+
+            # Mark the rows this account has entered.
+            entered = self.caches.entered.filter_entered(
+                self.profile["name"], [row.giveaway_id for row in giveaway_rows])
+            return GiveawayPage(has_results, [row._replace(faded=row.giveaway_id in entered) for row in giveaway_rows],
+                                total_results, last_page)
+
+        # Retrieve the html of the search and parse it.
+        with self.metrics.time("page_fetch"):
+            html = self.get_request_text(self.base_search_url + search)
+        with self.metrics.time("page_parse"):
+            giveaway_page = self.parse_page(html)
+
+        # Remember the entered giveaways of this account and share the page without them being marked.
+        self.caches.entered.add(self.profile["name"], [row.giveaway_id for row in giveaway_page.rows if row.faded])
+        self.caches.pages.put(search, giveaway_page.has_results,
+                              [list(row._replace(faded=False)) for row in giveaway_page.rows],
+                              giveaway_page.total_results, giveaway_page.last_page)
+        return giveaway_page
+
+    def parse_giveaways_page(self, giveaway_page, parsed_entries, level, page):
         self.display.log_console_text("Retrieving giveaways for (level, page)=(%i, %i)." % (level, page))
 
         # Check if the site give a no-results page, if no-results then return false.
-        if soup.find("div", {"class": "pagination pagination--no-results"}) is not None:
+        if not giveaway_page.has_results:
             self.display.log_console_text("There were no entries at (level, page)=(%i, %i)." % (level, page), log_error)
             return False
 
-        # Retrieve all the entries.
-        giveaway_list = soup.find("div", "widget-container").findChild(has_no_class, recursive=False).findChild(
-            has_no_class, recursive=False)
-        giveaway_entries = giveaway_list.findAll("div", "giveaway__row-inner-wrap")
+        # Look up the giveaways that were rejected on an earlier run, all at once.
+        incremental_config = self.config.get("incremental", {})
+        seen = {}
+        if incremental_config.get("enabled", True):
+            seen = self.caches.seen.filter_seen(
+                self.profile["name"], [row.giveaway_id for row in giveaway_page.rows if not row.faded],
+                self.still_rejected)
+
+        # Stop paging the level when the page only holds giveaways we already processed, the next pages are older.
+        if incremental_config.get("early_stop", True) and giveaway_page.rows and \
+                all(row.faded or row.giveaway_id in seen for row in giveaway_page.rows):
+            self.stats["skipped"] += len(seen)
+            self.display.log_console_text(
+                "Only known giveaways at (level, page)=(%i, %i), skipping the rest of the level." % (level, page))
+            return False
 
         # Print the giveaways TODO: Keep mining giveaways until we got enough to spend 3x the total amount of points, this gives a good set of games.
-        for giveaway_entry in giveaway_entries:
+        for row in giveaway_page.rows:
             # Check if the giveaway is not faded (already enrolled).
-            if 'is-faded' in giveaway_entry['class']:
+            if row.faded:
+                continue
+
+            # Skip the giveaways that were rejected before, without looking them up again.
+            if row.giveaway_id in seen:
+                self.stats["skipped"] += 1
                 continue
 
-            # Get the name and set the rating default.
-            app_name = giveaway_entry.find("a", {"class": "giveaway__heading__name"}).text
+            # Skip the giveaways with too many entries per copy, before spending a rating lookup on them.
+            if not self.filter_giveaway_entries(row):
+                self.display.log_console_text(
+                    "Passing giveaway: %s, too many entries: %i for %i copies" % (row.name, row.entries, row.copies))
+                self.remember_rejected(row.giveaway_id, "entries", row.end_time, row.entries / row.copies)
+                continue
 
-            # Retrieve the steamDB rating.
-            sdb_rating = self.get_giveaway_score(giveaway_entry.find("a", {"class": "giveaway__icon"})['href'])
+            # Queue the giveaway to retrieve the steamDB rating.
+            entry = dict(
+                name=row.name,
+                points=row.points,
+                page=row.href,
+                giveaway_id=row.giveaway_id,
+                copies=row.copies,
+                entries=row.entries,
+                end_time=row.end_time
+            )
+            self.rating_pipeline.submit(row.steam_url, entry)
+            self.stats["candidates"] += 1
+
+        # Consume the ratings that were resolved in the meantime.
+        self.consume_rated_giveaways(parsed_entries)
+        return True
+
+    def wait_for_ratings(self, parsed_entries, min_total_points):
+        # Block on the pending ratings while they could be enough to reach the points target.
+        while self.rating_pipeline.pending and \
+                parsed_entries["totalPoints"] + self.rating_pipeline.pending_points >= min_total_points:
+            self.consume_rated_giveaways(parsed_entries, block=True, limit=1)
+
+    def consume_rated_giveaways(self, parsed_entries, block=False, limit=None):
+        consumed = 0
+        while limit is None or consumed < limit:
+            rated = self.rating_pipeline.get(block=block)
+            if rated is None:
+                return
+            consumed += 1
+            entry, sdb_rating, error = rated
+
+            # A failed lookup gets no rating, but is tried again on the next run.
+            lookup_failed = sdb_rating is None
+            if lookup_failed:
+                self.display.log_console_text("Could not retrieve steam information for %s: %s" % (
+                    entry["name"], error or "the app could not be loaded"), log_error)
+                sdb_rating = 0
 
             # Check if the minimal rating filter passed.
             if not self.filter_giveaway_sdb_rating(sdb_rating):
                 # Show a warning error that it had insufficient rating, thus was not added.
                 self.display.log_console_text(
-                    "Passing giveaway: %s, insufficient rating: %0.2f" % (app_name, sdb_rating))
+                    "Passing giveaway: %s, insufficient rating: %0.2f" % (entry["name"], sdb_rating))
+                if not lookup_failed:
+                    self.remember_rejected(entry["giveaway_id"], "rating", entry["end_time"], sdb_rating)
+                continue
+
+            # Check if the odds per point are good enough.
+            entry["rating"] = sdb_rating
+            entry["expected_value"] = expected_value(entry)
+            min_expected_value = self.config["search"].get("min_expected_value")
+            if min_expected_value and entry["expected_value"] < min_expected_value:
+                self.display.log_console_text(
+                    "Passing giveaway: %s, insufficient expected value: %f" % (entry["name"], entry["expected_value"]))
+                self.remember_rejected(entry["giveaway_id"], "expected_value", entry["end_time"],
+                                       entry["expected_value"])
                 continue
 
             # Append to the entries.
-            entry = dict(
-                name=app_name,
-                points=int(giveaway_entry.find_all("span", {"class": "giveaway__heading__thin"})[-1].text[1:-2]),
-                page=giveaway_entry.find("a", {"class": "giveaway__heading__name"})['href'],
-                giveaway_id=giveaway_entry.find("a", {"class": "giveaway__heading__name"})['href'].split("/")[2],
-                rating=sdb_rating
-            )
             parsed_entries['entries'].append(entry)
+            parsed_entries['found'] += 1
             parsed_entries['totalPoints'] += entry['points']
 
-            self.display.update_current_mining_display(len(parsed_entries['entries']), parsed_entries['totalPoints'])
+            self.display.update_current_mining_display(parsed_entries['found'], parsed_entries['totalPoints'])
 
             # Log the addition of the give-away.
             self.display.log_console_text("Adding giveaway: " + str(entry))
 
+    def remember_rejected(self, giveaway_id, reason, end_time, value=None):
+        # Remember the rejected giveaway until it ends, so the next runs skip it.
+        if self.config.get("incremental", {}).get("enabled", True):
+            self.caches.seen.add(self.profile["name"], giveaway_id, reason, end_time, value)
+
+    def still_rejected(self, reason, value):
+        # Check the value a giveaway was rejected for against the current filters, it is looked up again if it passes.
+        # The giveaways remembered without their value stay skipped.
+        if value is None:
+            return True
+        if reason == "entries":
+            max_entries_per_copy = self.config["search"].get("max_entries_per_copy")
+            return bool(max_entries_per_copy) and value > max_entries_per_copy
+        if reason == "rating":
+            return not self.filter_giveaway_sdb_rating(value)
+        if reason == "expected_value":
+            min_expected_value = self.config["search"].get("min_expected_value")
+            return bool(min_expected_value) and value < min_expected_value
+        return True
+
+    def filter_giveaway_entries(self, row):
+        # Check if the entries per copy are inside the requested boundaries.
+        max_entries_per_copy = self.config["search"].get("max_entries_per_copy")
+        if max_entries_per_copy and row.entries is not None and row.entries / row.copies > max_entries_per_copy:
+            return False
         return True
 
     def filter_giveaway_sdb_rating(self, sdb_rating):
@@ -257,104 +654,143 @@ class SteamGifts:
 
         # Return the game score if the entry is a single game.
         if steam_type == "app":
-            return self.get_game_score(steam_id)
+            with self.metrics.time("rating"):
+                return self.get_game_score(steam_id)
 
         # Return the bundle score if the entry is a bundle (multiple games).
         if steam_type == "sub":
-            return self.get_bundle_score(steam_id)
+            with self.metrics.time("bundle_rating"):
+                return self.get_bundle_score(steam_id)
 
-        # Return a not implemented error, negative function.
-        self.display.log_console_text("Giveaway-type (%s) not implemented!" % steam_type, log_error)
+        # Return a negative score for the giveaway-types that are not implemented.
         return -1
 
     def get_bundle_score(self, steam_bundle_id):
+        # Get the apps inside the bundle.
+        bundle_appids = self.get_bundle_appids(steam_bundle_id)
+
+        # Get the reviews of the games inside the bundle all at once, and score them in one batch.
+        return self.scorer.bundle_score(list(self.rating_executor.map(self.get_game_reviews, bundle_appids)))
+
+    def get_bundle_appids(self, steam_bundle_id):
+        # Use the cached bundle composition, as it almost never changes.
+        bundle_appids = self.caches.bundles.get(steam_bundle_id)
+        if bundle_appids is not None:
+            return bundle_appids
+
         # Get the soup of the bundle page.
-        soup = self.get_request_soup("https://store.steampowered.com/sub/%s" % steam_bundle_id)
+        with self.metrics.time("bundle_fetch"):
+            soup = self.get_request_soup(self.store_url + "sub/%s" % steam_bundle_id)
 
         # Retrieve all the entries of the bundle.
         bundle_entries = soup.find_all("div", {"class": ["tab_item", "app_impression_tracked"]})
+        bundle_appids = [bundle_entry["data-ds-appid"] for bundle_entry in bundle_entries]
 
-        # Get the rating of the games inside the bundle.
-        total_bundle_score = 0
-        for bundle_entry in bundle_entries:
-            total_bundle_score += self.get_game_score(bundle_entry["data-ds-appid"])
+        # Only store bundles we could actually read.
+        if bundle_appids:
+            self.caches.bundles.put(steam_bundle_id, bundle_appids)
+        return bundle_appids
 
-        # Return avg game score.
-        if total_bundle_score != 0:
-            return total_bundle_score / len(bundle_entries)
-        return 0
+    def uses_catalog(self):
+        ratings_config = self.config.get("ratings", {})
+        return ratings_config.get("offline", False) or ratings_config.get("catalog", False)
 
     def get_game_score(self, steam_game_id):
-        # Get the app details.
-        try:
-            app_details = steamspypi.download(dict(request="appdetails", appid=str(steam_game_id)))
-        except json.decoder.JSONDecodeError:
-            # Could not load the app.
-            self.display.log_console_text("Could not retrieve steam information for app %s" % steam_game_id, log_error)
-            return 0
-        # Check if the game has any reviews.
-        if "positive" not in app_details or "negative" not in app_details:
-            return 0
-        # Get the positive and negative reviews.
-        reviews_positive = int(app_details["positive"])
-        reviews_negative = int(app_details["negative"])
-        reviews_total = reviews_positive + reviews_negative
-
-        # Check if there are any reviews for the algorithm.
-        if reviews_total > 0:
-            reviews_score = reviews_positive / reviews_total
-            return (reviews_score - (reviews_score - 0.5) * 2 ** -math.log10(reviews_total + 1)) * 100
-
-        # Return 0, as there were no reviews found.
-        return 0
-
-    def enter_giveaways(self, giveaways):
-        self.display.log_console_text("\nStart entering giveaways!", config=log_verbose)
-
-        # Loop through each giveaway.
-        for giveaway in giveaways:
-            self.enter_giveaway(giveaway)
-
-    def enter_giveaway(self, giveaway):
-
-        # Check if we have enough points to enter.
-        if giveaway["points"] > self.profile["points"]:
-            return False
+        # Score the reviews of the app, None if the app could not be loaded. The consumer of the rating logs it.
+        reviews = self.get_game_reviews(steam_game_id)
+        if reviews is None:
+            return None
+        return self.scorer.score(*reviews)
+
+    def get_game_reviews(self, steam_game_id):
+        # Answer from the imported catalog when it holds recent reviews, offline any reviews it holds are used.
+        offline = self.config.get("ratings", {}).get("offline", False)
+        use_catalog = self.uses_catalog()
+        if use_catalog:
+            catalog_reviews = self.caches.catalog.get(steam_game_id)
+            if catalog_reviews is not None and (catalog_reviews[1] or offline):
+                return catalog_reviews[0]
+            if offline:
+                return None
+
+        # Use the cached reviews when we have seen the app recently.
+        cached_rating = self.caches.ratings.get(steam_game_id)
+        if cached_rating is not None:
+            cached_reviews, score, model = cached_rating
+            self.scorer.remember_stored(cached_reviews, score, model)
+            return cached_reviews
+
+        # Retrieve the reviews, None if the app could not be loaded.
+        with self.metrics.time("rating_fetch"):
+            reviews = fetch_reviews(self.session, steam_game_id, self.steamspy_url)
+        if reviews is None:
+            return None
 
-        # First sleep random amount of time to not get a block.
-        time.sleep(float(random.randint(300, 950)) / 1000)
+        # Store the reviews for the next runs, a stale catalog row is refreshed at the same time.
+        self.caches.ratings.put(steam_game_id, *reviews, self.scorer.score(*reviews), self.scorer.model)
+        if use_catalog:
+            self.caches.catalog.put(steam_game_id, *reviews, self.scorer)
+        return reviews
 
-        # Send the server a request to join the giveaway (with some sleep before).
-        entry = requests.post(self.base_url + 'ajax.php',
-                              data={'xsrf_token': self.profile["xsrf_token"], 'do': 'entry_insert',
-                                    'code': giveaway["giveaway_id"]},
-                              cookies=self.cookie)
+    def select_giveaways(self, giveaways):
+        # Choose the giveaways that give the most value for the points we have.
+        selector = EntrySelector(self.config.get("selection", {}))
+        selected, total_value = selector.select(giveaways, self.profile["points"])
+        self.display.log_console_text("\nSelected %i of %i giveaways for %iP, with a total value of %0.2f." % (
+            len(selected), len(giveaways), sum(giveaway["points"] for giveaway in selected), total_value),
+            config=log_verbose)
 
-        # Check if the request was successful, so we can lower the points available on the profile.
-        json_data = json.loads(entry.text)
+        # Keep the other giveaways as fallback, for the points left when an entry fails.
+        selected_ids = set(id(giveaway) for giveaway in selected)
+        return selected + [giveaway for giveaway in giveaways if id(giveaway) not in selected_ids]
 
-        if json_data['type'] == 'success':
-            # Lower the total points of the profile
-            self.profile["points"] -= giveaway["points"]
+    def enter_giveaways(self, giveaways):
+        self.display.log_console_text("\nStart entering giveaways!", config=log_verbose)
 
-            # Update the profile display, by recreating it.
-            self.display.update_profile_display(self.profile)
+        # Enter multiple giveaways at once, within the points we have.
+        EntryExecutor(self, self.config.get("entry", {})).run(giveaways)
 
-            # Print that we entered the give-away.
-            print("Entered giveaway: ", giveaway)
-            self.display.log_console_text("Entered giveaway: " + str(giveaway), config=log_info)
-            self.display.current_session_entered.set(str(int(self.display.current_session_entered.get()) + 1))
-            return True
+    def enter_streamed_giveaways(self):
+        # Enter the most valuable giveaways as soon as they are found, the others are selected when all are found.
+        streaming_config = self.config.get("streaming", {})
+        selector = EntrySelector(self.config.get("selection", {}))
+        candidates = self.stream_giveaways()
+        try:
+            self.enter_giveaways(select_stream(
+                candidates, selector, self.select_giveaways, top_k=streaming_config.get("top_k", 50),
+                enter_value_per_point=streaming_config.get("enter_value_per_point", 0.08)))
+        finally:
+            # Stop fetching pages once we can not enter more giveaways.
+            candidates.close()
 
-        self.display.log_console_text("Could not enter giveaway: " + str(json_data), config=log_error)
-        return False
+    def enter_giveaway(self, giveaway):
+        # Send the server a request to join the giveaway, the session waits for the rate limit.
+        ajax_url = self.base_url + 'ajax.php'
+        with self.metrics.time("entry_post"):
+            entry = self.session.post(ajax_url, data={'xsrf_token': self.profile["xsrf_token"], 'do': 'entry_insert',
+                                                      'code': giveaway["giveaway_id"]})
 
+        # Return the response, None if the request should be tried again.
+        try:
+            json_data = json.loads(entry.text)
+        except ValueError:
+            # Instead of json we got an error page, we are going too fast.
+            self.rate_limiter.throttled(ajax_url)
+            return None
 
-# A function to retrieve a tag without an class.
-def has_no_class(tag):
-    return not tag.has_attr('class')
+        # Errors other than missing points are a sign we are going too fast.
+        if json_data.get('type') != 'success' and "point" not in str(json_data.get("msg", "")).lower():
+            self.rate_limiter.throttled(ajax_url)
+        return json_data
 
+    def record_entry(self, giveaway, points):
+        # Update the points of the profile and the profile display, by recreating it.
+        self.profile["points"] = points
+        self.display.update_profile_display(self.profile)
 
-def random_sleep(sleep):
-    if sleep:
-        time.sleep(float(random.randint(500, 1200)) / 1000)
+        # Print that we entered the give-away.
+        self.display.log_console_text("Entered giveaway: " + str(giveaway), config=log_info)
+        self.caches.entered.add(self.profile["name"], [giveaway["giveaway_id"]])
+        self.stats["entered"] += 1
+        self.stats["points_spent"] += giveaway["points"]
+        self.display.update_entered_display(self.stats["entered"])